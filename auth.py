@@ -1,5 +1,11 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,16 +13,42 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from database import get_db
+from cache import TTLCache
+from database import get_db, get_read_db
 from models import User
+from settings import settings
 
-SECRET_KEY = "your-secret-key-change-in-production"
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+
+# Кэши аутентификации: расшифрованные токены и сведения о пользователях.
+# Изменения прав сбрасываются через invalidate_user, TTL ограничивает
+# устаревание данных в остальных процессах.
+TOKEN_CACHE_SIZE = 10000
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL_SECONDS = 60
+
+# Параметры хеширования паролей. Хеши с другим числом раундов
+# прозрачно пересчитываются при следующем входе пользователя.
+PBKDF2_ROUNDS = settings.pbkdf2_rounds
+# Потоки для хеширования и предельное число ожидающих операций,
+# после которого вход и регистрация отвечают 503
+HASH_WORKERS = settings.hash_workers
+HASH_QUEUE_LIMIT = settings.hash_queue_limit
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__max_rounds=PBKDF2_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -26,6 +58,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def hash_queue_length() -> int:
+    """Сколько задач хеширования сейчас в очереди или выполняется"""
+    return _hash_pending
+
+
+async def _run_hashing(func, *args):
+    """Выполнить хеширование в отдельном пуле, не блокируя event loop"""
+    global _hash_pending
+    if _hash_pending >= HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверить пароль; вторым значением вернуть новый хеш, если параметры хеширования изменились"""
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -37,27 +99,126 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    """Облегченные сведения о пользователе для проверок доступа, без строки из БД"""
+    id: int
+    username: str
+    is_active: bool
+    is_seller: bool
+
+
+# token -> (user_id или None, username)
+token_cache = TTLCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# user_id -> Principal
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    """Сбросить кэшированные сведения о пользователе (смена роли, блокировка)"""
+    user_cache.pop(user_id)
+
+
+def _decode_token(token: str):
+    """Расшифровать токен (с кэшем); вернуть (user_id, username) или None"""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    # Токены, выпущенные до появления claim uid, содержат только username
+    claims = (payload.get("uid"), username)
+    expires_at = payload.get("exp")
+    token_cache.set(token, claims, ttl=expires_at - time.time() if expires_at else None)
+    return claims
+
+
+# token -> задача проверки токена; задается на время пакетного запроса (routers/batch.py)
+_shared_principals: ContextVar[Optional[Dict[str, asyncio.Future]]] = ContextVar("shared_principals", default=None)
+
+
+@contextmanager
+def share_principals():
+    """Внутри блока каждый токен проверяется один раз, подзапросы ждут общий результат"""
+    token = _shared_principals.set({})
+    try:
+        yield
+    finally:
+        _shared_principals.reset(token)
+
+
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_read_db)
+) -> Principal:
+    shared = _shared_principals.get()
+    if shared is None:
+        return await _load_principal(token, db)
+    if token not in shared:
+        shared[token] = asyncio.ensure_future(_load_principal(token, db))
+    return await asyncio.shield(shared[token])
+
+
+async def _load_principal(token: str, db: AsyncSession) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    claims = _decode_token(token)
+    if claims is None:
         raise credentials_exception
+    user_id, username = claims
     
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
-    if user is None:
+    principal = user_cache.get(user_id) if user_id is not None else None
+    if principal is not None:
+        return principal
+    
+    query = select(User.id, User.username, User.is_active, User.is_seller)
+    if user_id is not None:
+        query = query.where(User.id == user_id)
+    else:
+        query = query.where(User.username == username)
+    result = await db.execute(query)
+    row = result.one_or_none()
+    if row is None:
         raise credentials_exception
+    
+    principal = Principal(
+        id=row.id,
+        username=row.username,
+        is_active=bool(row.is_active),
+        is_seller=bool(row.is_seller)
+    )
+    user_cache.set(principal.id, principal)
+    return principal
+
+
+async def get_current_active_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Полная строка пользователя из БД - только для обработчиков, которым она нужна"""
+    user = await db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
@@ -70,8 +231,8 @@ async def get_current_active_user(
 
 
 async def get_current_seller(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_principal)
+) -> Principal:
     if not current_user.is_seller:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
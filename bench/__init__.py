@@ -0,0 +1 @@
+# Нагрузочные сценарии и генератор синтетических данных: python -m bench --help
@@ -0,0 +1,122 @@
+"""Нагрузочный прогон приложения в процессе, без сети.
+
+    python -m bench --seed 42 --output results/bench.json
+
+Создает отдельную базу, применяет миграции, заполняет ее синтетическими
+данными и выполняет сценарии через httpx.ASGITransport. Результат - JSON
+с p50/p95/p99, пропускной способностью и числом запросов к базе на запрос.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Нагрузочные сценарии маркетплейса")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=1000, help="всего пользователей, включая продавцов")
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=10000, help="заказов в истории")
+    parser.add_argument("--requests", type=int, default=500, help="запросов в сценариях каталога и истории")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--walkers", type=int, default=5, help="параллельных проходов по каталогу")
+    parser.add_argument("--pages", type=int, default=30, help="глубина прохода по каталогу")
+    parser.add_argument("--checkout-buyers", type=int, default=200)
+    parser.add_argument("--checkout-stock", type=int, default=50)
+    parser.add_argument("--scenarios", default="all", help="через запятую, по умолчанию все")
+    parser.add_argument("--database", help="файл базы (по умолчанию временный)")
+    parser.add_argument("--output", help="куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+    if args.sellers < 1 or args.users <= args.sellers:
+        parser.error("нужен хотя бы один продавец и хотя бы один покупатель")
+    return args
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args, database_path: str) -> dict:
+    import httpx
+
+    from bench.datagen import generate
+    from bench.scenarios import SCENARIOS
+    from database import engine
+    from main import app
+
+    dataset = await generate(engine, args.seed, args.users, args.sellers, args.products, args.orders)
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    scenario_args = {
+        "catalog_browse": (args.requests, args.concurrency),
+        "deep_pagination": (args.walkers, args.pages),
+        "login_storm": (args.logins, args.concurrency),
+        "concurrent_checkout": (args.checkout_buyers, args.checkout_stock),
+        "order_history": (args.requests, args.concurrency),
+    }
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in names:
+                # У каждого сценария свой генератор: состав запросов не зависит от набора сценариев
+                rng = random.Random(f"{args.seed}:{name}")
+                result = await SCENARIOS[name](client, dataset, rng, *scenario_args[name])
+                results[name] = result.report()
+
+    return {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "database": database_path,
+        "dataset": dataset.summary(),
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = None
+    database_path = args.database
+    if database_path is None:
+        workdir = tempfile.TemporaryDirectory(prefix="marketplace-bench-")
+        database_path = os.path.join(workdir.name, "bench.db")
+    if os.path.exists(database_path):
+        sys.exit(f"{database_path} уже существует: для прогона нужна пустая база")
+
+    # Настройки читаются при импорте модулей приложения, поэтому URL задается до импорта
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    os.environ.pop("READ_DATABASE_URL", None)
+    from database import run_migrations
+    run_migrations()
+
+    report = asyncio.run(run(args, database_path))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if workdir is not None:
+        workdir.cleanup()
+    checkout = report["scenarios"].get("concurrent_checkout")
+    if checkout and checkout["oversold"]:
+        sys.exit("concurrent_checkout: продано больше остатка")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from auth import pwd_context
+from models import Commission, Order, OrderItem, Product, User
+from popularity import rebuild_sales_stats
+from rollups import rebuild_rollups
+from search import rebuild_search_index
+
+# Пароль всех сгенерированных пользователей
+BENCH_PASSWORD = "benchpass1"
+# Даты истории отсчитываются от фиксированного момента, чтобы данные не зависели от дня запуска
+EPOCH = datetime(2026, 1, 1)
+INSERT_CHUNK_SIZE = 2000
+COMMISSION_RATE = 0.1
+
+ADJECTIVES = ["красный", "синий", "легкий", "прочный", "компактный", "умный", "теплый", "быстрый", "тихий", "яркий"]
+NOUNS = ["чайник", "рюкзак", "фонарь", "кабель", "стул", "лампа", "плед", "кружка", "наушники", "зонт"]
+WORDS = ["для дома", "в подарок", "из металла", "на каждый день", "для поездок", "с гарантией", "новинка", "хит продаж"]
+
+
+@dataclass
+class Dataset:
+    """Что сгенерировано: на эти id опираются сценарии"""
+    seed: int
+    buyers: List[dict] = field(default_factory=list)   # {"id", "username"}
+    sellers: List[dict] = field(default_factory=list)
+    product_ids: List[int] = field(default_factory=list)
+    orders: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "seed": self.seed,
+            "buyers": len(self.buyers),
+            "sellers": len(self.sellers),
+            "products": len(self.product_ids),
+            "orders": self.orders
+        }
+
+
+async def _insert_chunked(conn, table, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        await conn.execute(insert(table), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+async def generate(engine, seed: int, users: int, sellers: int, products: int, orders: int) -> Dataset:
+    """Заполнить пустую базу детерминированными данными (одинаковые seed и размеры - одинаковые данные)"""
+    rng = random.Random(seed)
+    dataset = Dataset(seed=seed)
+    # Хеш считается один раз: соль в нем случайная, но на сценарии это не влияет
+    hashed_password = pwd_context.hash(BENCH_PASSWORD)
+
+    user_rows = []
+    for user_id in range(1, users + 1):
+        is_seller = user_id <= sellers
+        username = f"{'seller' if is_seller else 'buyer'}{user_id}"
+        user_rows.append({
+            "id": user_id,
+            "email": f"{username}@bench.example",
+            "username": username,
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_seller": is_seller,
+            "created_at": EPOCH - timedelta(days=400)
+        })
+        (dataset.sellers if is_seller else dataset.buyers).append({"id": user_id, "username": username})
+
+    product_rows = []
+    for product_id in range(1, products + 1):
+        seller = dataset.sellers[rng.randrange(len(dataset.sellers))]
+        name = f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS)} {product_id}"
+        product_rows.append({
+            "id": product_id,
+            "name": name,
+            "description": f"{name} {rng.choice(WORDS)}, {rng.choice(WORDS)}",
+            "price": round(rng.uniform(50, 5000), 2),
+            "quantity": rng.randrange(0, 500),
+            "seller_id": seller["id"],
+            "sku": f"SKU-{product_id}",
+            "is_hot": False,
+            "created_at": EPOCH - timedelta(seconds=rng.randrange(365 * 86400))
+        })
+        dataset.product_ids.append(product_id)
+
+    order_rows, item_rows, commission_rows = [], [], []
+    item_id = 0
+    for order_id in range(1, orders + 1):
+        buyer = dataset.buyers[rng.randrange(len(dataset.buyers))]
+        created_at = EPOCH - timedelta(seconds=rng.randrange(365 * 86400))
+        seller_totals: Dict[int, float] = {}
+        total = 0.0
+        for product_id in rng.sample(dataset.product_ids, k=min(rng.randint(1, 4), len(dataset.product_ids))):
+            product = product_rows[product_id - 1]
+            quantity = rng.randint(1, 3)
+            item_id += 1
+            item_rows.append({
+                "id": item_id,
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price": product["price"]
+            })
+            amount = product["price"] * quantity
+            total += amount
+            seller_totals[product["seller_id"]] = seller_totals.get(product["seller_id"], 0.0) + amount
+        order_rows.append({
+            "id": order_id,
+            "buyer_id": buyer["id"],
+            "total_amount": total,
+            "status": rng.choice(["pending", "completed", "completed"]),
+            "created_at": created_at
+        })
+        for seller_id, amount in seller_totals.items():
+            commission_rows.append({
+                "order_id": order_id,
+                "seller_id": seller_id,
+                "amount": amount,
+                "commission_rate": COMMISSION_RATE,
+                "commission_amount": amount * COMMISSION_RATE,
+                "seller_amount": amount * (1 - COMMISSION_RATE),
+                "created_at": created_at
+            })
+    dataset.orders = orders
+
+    async with engine.begin() as conn:
+        await _insert_chunked(conn, User.__table__, user_rows)
+        await _insert_chunked(conn, Product.__table__, product_rows)
+        await _insert_chunked(conn, Order.__table__, order_rows)
+        await _insert_chunked(conn, OrderItem.__table__, item_rows)
+        await _insert_chunked(conn, Commission.__table__, commission_rows)
+        await rebuild_search_index(conn)
+        await rebuild_rollups(conn)
+        await rebuild_sales_stats(conn)
+    return dataset
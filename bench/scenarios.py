@@ -0,0 +1,212 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import select
+
+from auth import create_access_token
+from database import async_session_maker
+from models import Product
+from bench.datagen import BENCH_PASSWORD, NOUNS, Dataset
+
+PRODUCT_SORTS = ["id", "newest", "price_asc", "price_desc", "name", "popular"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    duration: float = 0.0
+    details: Dict[str, object] = field(default_factory=dict)
+
+    def record(self, elapsed: float, response: httpx.Response):
+        self.latencies.append(elapsed)
+        self.statuses[response.status_code] += 1
+        if "x-db-queries" in response.headers:
+            self.queries.append(int(response.headers["x-db-queries"]))
+
+    def report(self) -> dict:
+        latencies_ms = [value * 1000 for value in self.latencies]
+        return {
+            "requests": len(self.latencies),
+            "errors": sum(count for code, count in self.statuses.items() if code >= 500),
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "duration_s": round(self.duration, 3),
+            "throughput_rps": round(len(self.latencies) / self.duration, 1) if self.duration else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies_ms, 50), 3),
+                "p95": round(percentile(latencies_ms, 95), 3),
+                "p99": round(percentile(latencies_ms, 99), 3),
+                "max": round(max(latencies_ms, default=0.0), 3),
+                "mean": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0
+            },
+            "queries_per_request": {
+                "mean": round(sum(self.queries) / len(self.queries), 2) if self.queries else 0.0,
+                "p95": percentile(self.queries, 95),
+                "max": max(self.queries, default=0)
+            },
+            **self.details
+        }
+
+
+def bearer(user: dict) -> Dict[str, str]:
+    """Заголовок авторизации без входа через API (вход проверяет отдельный сценарий)"""
+    token = create_access_token({"sub": user["username"], "uid": user["id"]}, timedelta(hours=1))
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _timed(client: httpx.AsyncClient, result: ScenarioResult, method: str, url: str, **kwargs) -> httpx.Response:
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    result.record(time.perf_counter() - started, response)
+    return response
+
+
+async def _run(result: ScenarioResult, calls: List[Callable[[], Awaitable]], concurrency: int):
+    """Выполнить вызовы с ограничением параллельности и засечь общее время"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(call):
+        async with semaphore:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(call) for call in calls))
+    result.duration = time.perf_counter() - started
+
+
+async def catalog_browse(client, dataset: Dataset, rng: random.Random, requests: int, concurrency: int) -> ScenarioResult:
+    """Первые страницы каталога с фильтрами, карточки товаров и поиск"""
+    result = ScenarioResult("catalog_browse")
+    calls = []
+    for _ in range(requests):
+        kind = rng.random()
+        if kind < 0.7:
+            params = {"limit": 50, "sort": rng.choice(PRODUCT_SORTS)}
+            if rng.random() < 0.3:
+                params["min_price"] = rng.choice([100, 500, 1000])
+            if rng.random() < 0.3:
+                params["in_stock"] = "true"
+            calls.append(lambda params=params: _timed(client, result, "GET", "/api/products", params=params))
+        elif kind < 0.9:
+            product_id = rng.choice(dataset.product_ids)
+            calls.append(lambda product_id=product_id: _timed(client, result, "GET", f"/api/products/{product_id}"))
+        else:
+            params = {"q": rng.choice(NOUNS)}
+            calls.append(lambda params=params: _timed(client, result, "GET", "/api/products/search", params=params))
+    await _run(result, calls, concurrency)
+    return result
+
+
+async def deep_pagination(client, dataset: Dataset, rng: random.Random, walkers: int, pages: int) -> ScenarioResult:
+    """Проход по каталогу курсором на глубину pages страниц"""
+    result = ScenarioResult("deep_pagination")
+    walked = []
+
+    async def walk(sort: str):
+        cursor: Optional[str] = None
+        for page in range(pages):
+            params = {"limit": 100, "sort": sort}
+            if cursor:
+                params["cursor"] = cursor
+            response = await _timed(client, result, "GET", "/api/products", params=params)
+            cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+            if not cursor:
+                break
+        walked.append(page + 1)
+
+    calls = [lambda sort=rng.choice(PRODUCT_SORTS): walk(sort) for _ in range(walkers)]
+    await _run(result, calls, walkers)
+    result.details["pages_walked"] = sum(walked)
+    return result
+
+
+async def login_storm(client, dataset: Dataset, rng: random.Random, logins: int, concurrency: int) -> ScenarioResult:
+    """Одновременные входы: хеширование паролей и очередь пула хеширования"""
+    result = ScenarioResult("login_storm")
+    calls = []
+    for _ in range(logins):
+        user = rng.choice(dataset.buyers)
+        form = {"username": user["username"], "password": BENCH_PASSWORD}
+        calls.append(lambda form=form: _timed(client, result, "POST", "/api/auth/login", data=form))
+    await _run(result, calls, concurrency)
+    return result
+
+
+async def concurrent_checkout(client, dataset: Dataset, rng: random.Random, buyers: int, stock: int) -> ScenarioResult:
+    """Все покупатели одновременно покупают один товар; проверяем, что не продано больше остатка"""
+    result = ScenarioResult("concurrent_checkout")
+    seller = bearer(rng.choice(dataset.sellers))
+    response = await client.post(
+        "/api/products", headers=seller,
+        json={"name": "Bench flash sale", "price": 100, "quantity": stock}
+    )
+    response.raise_for_status()
+    product_id = response.json()["id"]
+
+    calls = []
+    for buyer in rng.sample(dataset.buyers, k=min(buyers, len(dataset.buyers))):
+        headers = bearer(buyer)
+        body = {"items": [{"product_id": product_id, "quantity": 1}]}
+        calls.append(lambda headers=headers, body=body: _timed(
+            client, result, "POST", "/api/orders", headers=headers, json=body
+        ))
+    await _run(result, calls, len(calls))
+
+    # Остаток читается из базы напрямую: ответ каталога может быть закэширован
+    async with async_session_maker() as db:
+        remaining = await db.scalar(select(Product.quantity).where(Product.id == product_id))
+    sold = result.statuses[201]
+    result.details.update({
+        "stock": stock,
+        "sold": sold,
+        "remaining": remaining,
+        "oversold": sold > stock or remaining < 0 or sold + remaining != stock
+    })
+    return result
+
+
+async def order_history(client, dataset: Dataset, rng: random.Random, requests: int, concurrency: int) -> ScenarioResult:
+    """История заказов покупателя: первая страница и следующая по before_id"""
+    result = ScenarioResult("order_history")
+
+    async def read_history(headers: Dict[str, str]):
+        response = await _timed(client, result, "GET", "/api/orders", headers=headers, params={"limit": 20})
+        orders = response.json() if response.status_code == 200 else []
+        if len(orders) == 20:
+            await _timed(
+                client, result, "GET", "/api/orders",
+                headers=headers, params={"limit": 20, "before_id": orders[-1]["id"]}
+            )
+
+    calls = [
+        lambda headers=bearer(rng.choice(dataset.buyers)): read_history(headers)
+        for _ in range(requests)
+    ]
+    await _run(result, calls, concurrency)
+    return result
+
+
+SCENARIOS = {
+    "catalog_browse": catalog_browse,
+    "deep_pagination": deep_pagination,
+    "login_storm": login_storm,
+    "concurrent_checkout": concurrent_checkout,
+    "order_history": order_history,
+}
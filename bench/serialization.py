@@ -0,0 +1,208 @@
+"""Микробенчмарк сериализации ответов: стоимость одной строки до и после.
+
+    python -m bench.serialization --rows 500
+
+"До" - прежний путь маршрутов: ORM-объекты или модели ответа, проверка через
+response_model в FastAPI и json.dumps в JSONResponse. "После" - строки выборки
+в словари и TypeAdapter.dump_json из serialization.py. База не нужна: строки
+генерируются в памяти.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import Commission, Product
+from schemas import CommissionResponse, OrderItemResponse, OrderResponse, ProductPage
+from serialization import (
+    COMMISSION_COLUMNS,
+    ORDER_COLUMNS,
+    PRODUCT_COLUMNS,
+    commission_list_adapter,
+    order_list_adapter,
+    product_page_adapter
+)
+
+EPOCH = datetime(2026, 1, 1)
+ITEMS_PER_ORDER = 3
+
+# Строки select(*COLUMNS) ведут себя как именованные кортежи
+ProductTuple = namedtuple("ProductTuple", [column.key for column in PRODUCT_COLUMNS])
+OrderTuple = namedtuple("OrderTuple", [column.key for column in ORDER_COLUMNS])
+CommissionTuple = namedtuple("CommissionTuple", [column.key for column in COMMISSION_COLUMNS])
+ItemTuple = namedtuple("ItemTuple", ["order_id", "id", "product_id", "product_name", "quantity", "price"])
+
+
+def _product_rows(rng: random.Random, count: int) -> List[ProductTuple]:
+    return [
+        ProductTuple(
+            name=f"Товар {index}", description=rng.choice([None, "Описание товара " * 5]),
+            price=round(rng.uniform(10, 5000), 2), quantity=rng.randint(0, 500),
+            sku=f"SKU-{index}", id=index, seller_id=rng.randint(1, 50), is_hot=False,
+            created_at=EPOCH + timedelta(seconds=index), updated_at=None
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def _order_rows(rng: random.Random, count: int):
+    orders = [
+        OrderTuple(id=index, buyer_id=7, total_amount=round(rng.uniform(10, 5000), 2),
+                   status="pending", created_at=EPOCH + timedelta(minutes=index))
+        for index in range(1, count + 1)
+    ]
+    items = [
+        ItemTuple(order_id=order.id, id=order.id * ITEMS_PER_ORDER + position,
+                  product_id=rng.randint(1, 5000), product_name=f"Товар {position}",
+                  quantity=rng.randint(1, 5), price=round(rng.uniform(10, 1000), 2))
+        for order in orders
+        for position in range(ITEMS_PER_ORDER)
+    ]
+    return orders, items
+
+
+def _commission_rows(rng: random.Random, count: int) -> List[CommissionTuple]:
+    rows = []
+    for index in range(1, count + 1):
+        amount = round(rng.uniform(10, 5000), 2)
+        rows.append(CommissionTuple(
+            id=index, order_id=index, seller_id=3, amount=amount, commission_rate=0.1,
+            commission_amount=amount * 0.1, seller_amount=amount * 0.9,
+            created_at=EPOCH + timedelta(minutes=index)
+        ))
+    return rows
+
+
+def _fastapi_encoder(response_type) -> Callable[[object], bytes]:
+    """Прежний путь: проверка по response_model и JSONResponse, как в FastAPI"""
+    field = create_response_field(name="Response", type_=response_type)
+    loop = asyncio.new_event_loop()
+
+    def encode(content) -> bytes:
+        value = loop.run_until_complete(serialize_response(field=field, response_content=content))
+        return JSONResponse(value).body
+
+    return encode
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _product_cases(rng: random.Random, rows: int):
+    tuples = _product_rows(rng, rows)
+    # Прежний GET /api/products: ORM-объекты через ProductPage(from_attributes=True)
+    products = [Product(**row._asdict()) for row in tuples]
+
+    def before() -> bytes:
+        page = {"items": products, "next_cursor": None}
+        return ProductPage.model_validate(page, from_attributes=True).model_dump_json().encode()
+
+    def after() -> bytes:
+        return product_page_adapter.dump_json({"items": [row._asdict() for row in tuples], "next_cursor": None})
+
+    return before, after
+
+
+def _order_cases(rng: random.Random, rows: int):
+    orders, items = _order_rows(rng, rows)
+    encode = _fastapi_encoder(List[OrderResponse])
+
+    # Прежний build_order_responses собирал модели, после чего их проверял response_model
+    def before() -> bytes:
+        items_by_order = {order.id: [] for order in orders}
+        for item in items:
+            items_by_order[item.order_id].append(OrderItemResponse(
+                id=item.id, product_id=item.product_id, product_name=item.product_name,
+                quantity=item.quantity, price=item.price
+            ))
+        responses = [
+            OrderResponse(
+                id=order.id, buyer_id=order.buyer_id, total_amount=order.total_amount,
+                status=order.status, created_at=order.created_at, items=items_by_order[order.id]
+            )
+            for order in orders
+        ]
+        return encode(responses)
+
+    def after() -> bytes:
+        items_by_order = {order.id: [] for order in orders}
+        for order_id, item_id, product_id, product_name, quantity, price in items:
+            items_by_order[order_id].append({
+                "id": item_id, "product_id": product_id, "product_name": product_name,
+                "quantity": quantity, "price": price
+            })
+        return order_list_adapter.dump_json([
+            {**order._asdict(), "items": items_by_order[order.id]} for order in orders
+        ])
+
+    return before, after
+
+
+def _commission_cases(rng: random.Random, rows: int):
+    tuples = _commission_rows(rng, rows)
+    # Прежний GET /api/commissions возвращал ORM-объекты, их разбирал response_model
+    commissions = [Commission(**row._asdict()) for row in tuples]
+    encode = _fastapi_encoder(List[CommissionResponse])
+
+    def before() -> bytes:
+        return encode(commissions)
+
+    def after() -> bytes:
+        return commission_list_adapter.dump_json([row._asdict() for row in tuples])
+
+    return before, after
+
+
+CASES = {
+    "products": _product_cases,
+    "orders": _order_cases,
+    "commissions": _commission_cases,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.serialization", description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=500, help="строк в одном ответе")
+    parser.add_argument("--repeat", type=int, default=50, help="повторов, берется лучшее время")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for name, make_cases in CASES.items():
+        before, after = make_cases(random.Random(f"{args.seed}:{name}"), args.rows)
+        # Оба пути должны давать один и тот же документ
+        if json.loads(before()) != json.loads(after()):
+            raise SystemExit(f"{name}: быстрый путь дает другой ответ")
+        before_us = _best_time(before, args.repeat) / args.rows * 1e6
+        after_us = _best_time(after, args.repeat) / args.rows * 1e6
+        report[name] = {
+            "before_us_per_row": round(before_us, 2),
+            "after_us_per_row": round(after_us, 2),
+            "speedup": round(before_us / after_us, 1)
+        }
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "results": report}, indent=2))
+        return
+    print(f"{'':<12}{'до, мкс/строка':>16}{'после, мкс/строка':>20}{'ускорение':>12}")
+    for name, result in report.items():
+        print(f"{name:<12}{result['before_us_per_row']:>16}{result['after_us_per_row']:>20}{result['speedup']:>11}x")
+
+
+if __name__ == "__main__":
+    main()
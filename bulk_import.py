@@ -0,0 +1,81 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Tuple, Union
+
+# Сколько строк проверяется и вставляется в одной транзакции
+IMPORT_CHUNK_SIZE = 500
+# Сколько ошибок по строкам попадает в отчет (остальные только считаются)
+MAX_REPORTED_ERRORS = 1000
+
+# Строка файла: (номер строки данных, словарь полей или текст ошибки разбора)
+ParsedRow = Tuple[int, Union[dict, str]]
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Разбить поток байтов UTF-8 на строки, не загружая его целиком"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in stream:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, "Expected a JSON object"
+            continue
+        yield row_number, data
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRow]:
+    """Строки CSV с заголовком; поля в кавычках могут содержать переводы строк"""
+    header = None
+    row_number = 0
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        # Нечетное число кавычек - запись продолжается на следующей строке
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Пустые ячейки считаются отсутствующими полями
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+    if pending:
+        yield row_number + 1, "Unterminated quoted field"
+
+
+async def iter_chunks(rows: AsyncIterator[ParsedRow], size: int = IMPORT_CHUNK_SIZE) -> AsyncIterator[List[ParsedRow]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,65 @@
+import hashlib
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from models import CatalogState
+
+CATALOG_CACHE_SIZE = 1000
+CATALOG_CACHE_TTL_SECONDS = 300
+
+# ETag -> готовое тело ответа. ETag включает версию каталога, поэтому
+# после любого изменения товаров старые записи просто перестают запрашиваться
+response_cache = TTLCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)
+
+
+async def bump_catalog_version(db: AsyncSession):
+    """Увеличить версию каталога в текущей транзакции"""
+    stmt = insert(CatalogState).values(id=1, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogState.id],
+        set_={"version": CatalogState.version + 1}
+    )
+    await db.execute(stmt)
+
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    result = await db.execute(select(CatalogState.version).where(CatalogState.id == 1))
+    return result.scalar_one_or_none() or 0
+
+
+def _make_etag(request: Request, version: int) -> str:
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{params}".encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Слабое сравнение с If-None-Match: W/"x" и "x" совпадают (сжатый ответ получает слабый ETag)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return if_none_match.strip() == "*" or etag.removeprefix("W/") in tags
+
+
+async def cached_json_response(
+    request: Request,
+    db: AsyncSession,
+    build: Callable[[], Awaitable[bytes]]
+) -> Response:
+    """Отдать ответ каталога с ETag: 304 при совпадении, иначе тело из кэша или из build()"""
+    etag = _make_etag(request, await get_catalog_version(db))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    body = response_cache.get(etag)
+    if body is None:
+        body = await build()
+        response_cache.set(etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
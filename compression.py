@@ -0,0 +1,108 @@
+import gzip
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдаются только gzip и исходные байты
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 11
+
+# Типы ответов API, которые сжимает JSONCompressionMiddleware
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Разобрать Accept-Encoding в {кодировка: q}"""
+    encodings = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[token.strip().lower()] = q
+    return encodings
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Лучшая из доступных кодировок, которую принимает клиент (в порядке available), или None"""
+    accepted = parse_accept_encoding(header)
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """Заранее сжатые варианты тела: {"br": ..., "gzip": ...}, в порядке предпочтения"""
+    variants = {}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0: одинаковые байты при каждом запуске, ETag и кэши не меняются
+    variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    return variants
+
+
+def weak_etag(etag: str) -> str:
+    """Слабый ETag для сжатого представления: байты отличаются, содержимое то же"""
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class JSONCompressionMiddleware:
+    """ASGI-middleware: gzip для JSON-ответов API от minimum_size байт, если клиент его принимает.
+
+    Сжимается только ответ, пришедший одним сообщением; потоковые ответы
+    (выгрузки, события) проходят как есть, чтобы не задерживать их части.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or choose_encoding(Headers(scope=scope).get("accept-encoding"), ["gzip"]) is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0].strip()
+                if content_type in COMPRESSIBLE_TYPES and "content-encoding" not in headers:
+                    # Решение откладывается до тела: нужно знать его размер
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("Accept-Encoding")
+            if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+                headers["Content-Encoding"] = "gzip"
+                headers["Content-Length"] = str(len(body))
+                if "etag" in headers:
+                    headers["ETag"] = weak_etag(headers["etag"])
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
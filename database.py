@@ -1,10 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from settings import settings
+
+DATABASE_URL = settings.database_url
+READ_DATABASE_URL = settings.read_database_url or DATABASE_URL
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _create_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    read_only: bool = False,
+    explicit_transactions: bool = False
+):
+    kwargs = {
+        "echo": settings.database_echo,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.pool_timeout,
+    }
+    if _is_sqlite(url):
+        # aiosqlite по умолчанию открывает новое соединение на каждую сессию
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    new_engine = create_async_engine(url, **kwargs)
+    
+    if _is_sqlite(url):
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+            cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}")
+            cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+            if explicit_transactions:
+                # Драйвер sqlite3 сам открывает транзакцию только перед DML, и внешний
+                # SAVEPOINT без BEGIN фиксировался бы при RELEASE; управляем BEGIN сами
+                dbapi_connection.isolation_level = None
+        
+        if explicit_transactions:
+            @event.listens_for(new_engine.sync_engine, "begin")
+            def _begin_immediate(conn):
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+    
+    return new_engine
 
-DATABASE_URL = "sqlite+aiosqlite:///./marketplace.db"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Движок для записи и отдельный движок для чтения: в режиме WAL читатели
+# не ждут писателя, а собственный пул не дает чтениям стоять в очереди за записями
+engine = _create_engine(DATABASE_URL, settings.pool_size, settings.max_overflow)
+read_engine = _create_engine(
+    READ_DATABASE_URL, settings.read_pool_size, settings.read_max_overflow, read_only=True
+)
+# Единственное соединение писателя группового коммита (используется, если settings.group_commit)
+writer_engine = _create_engine(DATABASE_URL, 1, 0, explicit_transactions=True)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+writer_session_maker = async_sessionmaker(writer_engine, class_=AsyncSession, expire_on_commit=False)
+read_session_maker = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -17,7 +84,72 @@ async def get_db():
             await session.close()
 
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+class SerializedSession(AsyncSession):
+    """Сессия для нескольких одновременных задач: запросы выполняются по очереди.
+
+    Обычную AsyncSession нельзя использовать из параллельных задач; здесь
+    execute, scalar и get (scalars идет через execute) берут общую блокировку.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args, **kwargs):
+        async with self._lock:
+            return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        async with self._lock:
+            return await super().scalar(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        async with self._lock:
+            return await super().get(*args, **kwargs)
+
+
+# Общая сессия чтения пакетного запроса (routers/batch.py); вне пакета - None
+_shared_read_session: ContextVar[Optional[AsyncSession]] = ContextVar("shared_read_session", default=None)
+
+
+@asynccontextmanager
+async def share_read_session():
+    """Все get_read_db внутри блока (и в созданных в нем задачах) получают одну сессию"""
+    async with SerializedSession(read_engine, expire_on_commit=False) as session:
+        token = _shared_read_session.set(session)
+        try:
+            yield session
+        finally:
+            _shared_read_session.reset(token)
+
+
+async def get_read_db():
+    """Сессия только для чтения - для GET-обработчиков"""
+    shared = _shared_read_session.get()
+    if shared is not None:
+        yield shared
+        return
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def _is_unversioned_database() -> bool:
+    """База создана через create_all до появления миграций (таблицы есть, версии нет)"""
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    await engine.dispose()
+    return "users" in tables and "alembic_version" not in tables
+
 
+def run_migrations():
+    """Применить миграции Alembic до последней версии (python main.py --migrate)"""
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config("alembic.ini")
+    if asyncio.run(_is_unversioned_database()):
+        command.stamp(config, "0001_baseline")
+    command.upgrade(config, "head")
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import secrets
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Set, Tuple
+
+# Очередь одного подписчика: сообщения, которые он еще не успел прочитать.
+# Переполнение означает, что клиент не успевает, - очередь сбрасывается и
+# он получает resync: перечитать каталог целиком вместо потерянных изменений
+SUBSCRIBER_QUEUE_SIZE = 64
+# Последние события для переподключения с Last-Event-ID
+REPLAY_BUFFER_SIZE = 1024
+# Комментарий раз в интервал держит соединение открытым через прокси
+HEARTBEAT_INTERVAL_SECONDS = 15.0
+# Через сколько миллисекунд браузер переподключается после обрыва
+RETRY_MS = 3000
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+HEARTBEAT = b": ping\n\n"
+
+
+class Subscriber:
+    def __init__(self, queue_size: int):
+        # None в очереди - сигнал закрыть поток (остановка приложения)
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(queue_size)
+
+    def push(self, message: Optional[bytes]):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Отстающий подписчик не тормозит остальных: теряет очередь и получает resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC if message is not None else None)
+
+
+class EventHub:
+    """Рассылка изменений товаров подписчикам SSE внутри процесса.
+
+    Событие кодируется один раз, подписчикам раздаются одни и те же байты;
+    простаивающее соединение - это только пустая очередь. Каждый воркер
+    uvicorn рассылает изменения, сделанные его же запросами.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, replay_size: int = REPLAY_BUFFER_SIZE):
+        # id события - "<эпоха>-<номер>": номер начинается заново в каждом процессе,
+        # и Last-Event-ID от другого процесса (после перезапуска или с другого
+        # воркера) распознается по эпохе, а не сравнивается с чужим номером
+        self.epoch = secrets.token_hex(4)
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self.last_id = 0
+        self.published_total = 0
+        self.resyncs_total = 0
+        self._recent: Deque[Tuple[int, bytes]] = deque(maxlen=replay_size)
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, changes: List[dict]):
+        """Разослать изменения товаров: [{"id": 1, "quantity": 4}, {"id": 2, "deleted": True}, ...]"""
+        if not changes:
+            return
+        self.last_id += 1
+        data = json.dumps(changes, separators=(",", ":"))
+        message = f"id: {self.epoch}-{self.last_id}\ndata: {data}\n\n".encode()
+        self._recent.append((self.last_id, message))
+        self.published_total += 1
+        for subscriber in self.subscribers:
+            if subscriber.queue.full():
+                self.resyncs_total += 1
+            subscriber.push(message)
+
+    def _replay(self, last_event_id: Optional[str]) -> List[bytes]:
+        """Пропущенные после last_event_id события или resync, если их уже нет в буфере"""
+        if last_event_id is None:
+            return []
+        epoch, _, number = last_event_id.partition("-")
+        try:
+            seen = int(number)
+        except ValueError:
+            return [RESYNC]
+        if epoch != self.epoch or seen > self.last_id:
+            return [RESYNC]
+        if seen == self.last_id:
+            return []
+        if not self._recent or seen < self._recent[0][0] - 1:
+            return [RESYNC]
+        return [message for event_id, message in self._recent if event_id > seen]
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Поток SSE для одного клиента; подписка снимается при отключении"""
+        subscriber = Subscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            for message in self._replay(last_event_id):
+                yield message
+            # id без data не вызывает событие, но запоминается браузером: даже клиент,
+            # не получивший ни одного изменения, переподключится с Last-Event-ID
+            # и после перезапуска сервера получит resync
+            yield f"id: {self.epoch}-{self.last_id}\n\n".encode()
+            while True:
+                message = await subscriber.queue.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.subscribers.discard(subscriber)
+
+    def start(self):
+        self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Открытые потоки завершаются, иначе остановка сервера ждала бы их
+        for subscriber in list(self.subscribers):
+            subscriber.push(None)
+
+    async def _heartbeat(self):
+        # Один таймер на все соединения, а не по таймеру на каждое
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+            for subscriber in self.subscribers:
+                if not subscriber.queue.full():
+                    subscriber.queue.put_nowait(HEARTBEAT)
+
+
+product_events = EventHub()
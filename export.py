@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, List, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, type_coerce
+
+from database import read_session_maker
+
+# Сколько строк читается из курсора и сериализуется за один шаг
+EXPORT_BATCH_SIZE = 1000
+
+
+def date_range_conditions(column, date_from: Optional[date], date_to: Optional[date]) -> list:
+    """Условия created_at в [date_from, date_to] включительно.
+
+    Границы сравниваются как строки 'YYYY-MM-DD', в том же формате, в котором
+    SQLite хранит CURRENT_TIMESTAMP, поэтому условие остается диапазоном по индексу.
+    """
+    conditions = []
+    if date_from is not None:
+        conditions.append(column >= type_coerce(date_from.isoformat(), String))
+    if date_to is not None:
+        conditions.append(column < type_coerce((date_to + timedelta(days=1)).isoformat(), String))
+    return conditions
+
+
+async def stream_partitions(query) -> AsyncIterator[Sequence]:
+    """Читать результат запроса порциями через серверный курсор.
+
+    Сессия открывается внутри генератора: StreamingResponse отдает тело уже
+    после выхода из обработчика и его зависимостей.
+    """
+    async with read_session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _ndjson_body(records: AsyncIterator[List[dict]]):
+    async for batch in records:
+        yield "".join(
+            json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+            for record in batch
+        )
+
+
+async def _csv_body(fields: List[str], records: AsyncIterator[List[dict]]):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    async for batch in records:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    records: AsyncIterator[List[dict]],
+    fields: List[str],
+    export_format: str,
+    filename: str
+) -> StreamingResponse:
+    """Потоковый ответ NDJSON или CSV из асинхронного источника порций записей"""
+    if export_format == "csv":
+        return StreamingResponse(
+            _csv_body(fields, records),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'}
+        )
+    return StreamingResponse(
+        _ndjson_body(records),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'}
+    )
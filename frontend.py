@@ -0,0 +1,101 @@
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response, status
+from jinja2 import Environment, FileSystemLoader
+
+from catalog_cache import etag_matches
+from compression import choose_encoding, compress_variants, weak_etag
+
+# Страницы ссылаются на ассеты по имени с хешем содержимого, поэтому ассет
+# кэшируется навсегда, а страница каждый раз сверяется по ETag и после
+# выкладки сразу указывает на новые файлы
+PAGE_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_PREFIX = "/static/"
+
+
+@dataclass
+class StaticFile:
+    """Готовое тело со сжатыми вариантами, отдается из памяти"""
+    content_type: str
+    cache_control: str
+    etag: str
+    body: bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, content_type: str, cache_control: str) -> "StaticFile":
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        variants = {
+            encoding: compressed
+            for encoding, compressed in compress_variants(body).items()
+            if len(compressed) < len(body)
+        }
+        return cls(content_type, cache_control, etag, body, variants)
+
+    def response(self, request: Request) -> Response:
+        """Ответ с ETag и Cache-Control: 304 при совпадении, иначе лучший вариант для Accept-Encoding"""
+        encoding = choose_encoding(request.headers.get("accept-encoding"), self.variants)
+        # Сжатый вариант получает слабый ETag, как ответы JSONCompressionMiddleware
+        etag = self.etag if encoding is None else weak_etag(self.etag)
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        body = self.body
+        if encoding is not None:
+            body = self.variants[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.content_type, headers=headers)
+
+
+class Frontend:
+    """HTML-страницы и статические ассеты, собранные один раз при старте.
+
+    Файлы из static/ получают имя с хешем содержимого (js/products.1a2b3c4d5e.js);
+    шаблоны рендерятся один раз, ссылки на ассеты подставляет static_url().
+    """
+
+    def __init__(self, templates_dir: str, static_dir: str):
+        self.assets: Dict[str, StaticFile] = {}  # путь с хешем -> файл
+        self.urls: Dict[str, str] = {}  # исходный путь -> URL с хешем
+        self.pages: Dict[str, StaticFile] = {}
+        self._load_assets(static_dir)
+        self._env = Environment(loader=FileSystemLoader(templates_dir), autoescape=True)
+        self._env.globals["static_url"] = self.static_url
+        for name in sorted(self._env.list_templates(extensions=["html"])):
+            html = self._env.get_template(name).render().encode()
+            self.pages[name] = StaticFile.build(html, "text/html", PAGE_CACHE_CONTROL)
+
+    def _load_assets(self, static_dir: str):
+        for root, _, files in os.walk(static_dir):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                with open(path, "rb") as file:
+                    body = file.read()
+                name = os.path.relpath(path, static_dir).replace(os.sep, "/")
+                stem, ext = os.path.splitext(name)
+                fingerprinted = f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}"
+                # Для text/* кодировку utf-8 в Content-Type добавляет Response
+                content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                self.assets[fingerprinted] = StaticFile.build(body, content_type, ASSET_CACHE_CONTROL)
+                self.urls[name] = STATIC_PREFIX + fingerprinted
+
+    def static_url(self, name: str) -> str:
+        """URL ассета с хешем содержимого (для шаблонов)"""
+        return self.urls[name]
+
+    def page(self, request: Request, name: str) -> Response:
+        return self.pages[name].response(request)
+
+    def asset(self, request: Request, path: str) -> Response:
+        asset = self.assets.get(path)
+        if asset is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Not found"
+            )
+        return asset.response(request)
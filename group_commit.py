@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import writer_session_maker
+from settings import settings
+
+T = TypeVar("T")
+
+# Единица записи: получает сессию, выполняет запросы и возвращает результат.
+# Сама не делает commit/rollback - транзакцией управляет run_write или писатель
+WriteUnit = Callable[[AsyncSession], Awaitable[T]]
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    """Единственный писатель, который применяет записи параллельных запросов пачками.
+
+    Каждый такт берет накопившиеся единицы записи и выполняет их в одной
+    транзакции, каждую в своей точке сохранения: ошибка одной единицы откатывает
+    только ее. После общего коммита каждый вызывающий получает свой результат
+    или свою ошибку. Один fsync приходится на пачку, а не на запрос.
+    """
+
+    def __init__(
+        self,
+        session_maker=writer_session_maker,
+        max_batch: int = settings.group_commit_max_batch,
+        max_delay: float = settings.group_commit_max_delay_ms / 1000
+    ):
+        self.session_maker = session_maker
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.units_total = 0
+        self.batches_total = 0
+        self._queue: "asyncio.Queue[Tuple[WriteUnit, asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Записи, которые не успели попасть в такт, выполняются напрямую
+        while not self._queue.empty():
+            await self._apply([self._queue.get_nowait()])
+
+    async def submit(self, unit: WriteUnit) -> T:
+        """Поставить единицу записи в очередь и дождаться ее результата после коммита"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((unit, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._apply(batch)
+            except Exception:
+                logger.exception("Group commit batch failed")
+
+    async def _apply(self, batch: List[Tuple[WriteUnit, asyncio.Future]]):
+        outcomes = []
+        try:
+            async with self.session_maker() as db:
+                async with db.begin():
+                    for unit, future in batch:
+                        if future.done():
+                            # Вызывающий уже отменен (клиент отключился) - не пишем
+                            outcomes.append(None)
+                            continue
+                        try:
+                            async with db.begin_nested():
+                                outcomes.append((True, await unit(db)))
+                        except Exception as exc:
+                            outcomes.append((False, exc))
+        except Exception as exc:
+            # Не удался общий коммит: ошибка достается всем единицам пачки
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches_total += 1
+        self.units_total += len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if outcome is None or future.done():
+                continue
+            ok, value = outcome
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+group_writer = GroupCommitWriter()
+
+
+async def run_write(db: AsyncSession, unit: WriteUnit) -> T:
+    """Выполнить единицу записи и зафиксировать ее.
+
+    С включенным settings.group_commit запись уходит писателю и коммитится
+    вместе с записями других запросов; иначе выполняется в сессии запроса.
+    """
+    if group_writer.enabled:
+        return await group_writer.submit(unit)
+    try:
+        result = await unit(db)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    return result
@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_cache import bump_catalog_version
+from database import async_session_maker
+from events import product_events
+from models import InventoryReservation, Product
+
+# Сколько живет резерв, если покупатель его не оформил
+RESERVATION_TTL_SECONDS = 600
+# Как часто принятые резервы записываются в журнал и списываются с остатка товара
+INVENTORY_FLUSH_INTERVAL_SECONDS = 0.2
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Reservation:
+    id: str
+    product_id: int
+    user_id: int
+    quantity: int
+    expires_at: datetime
+    journaled: bool = False  # уже записан в inventory_reservations и списан с products
+
+
+class InventoryManager:
+    """Остатки "горячих" товаров в памяти процесса.
+
+    available[product_id] - сколько еще можно зарезервировать: остаток из products
+    минус резервы, которые приняты, но еще не записаны. Резерв принимается или
+    отклоняется сразу, без обращения к базе; раз в INVENTORY_FLUSH_INTERVAL_SECONDS
+    накопленные резервы одной транзакцией пишутся в журнал и списываются с products.
+    Журнал разбирается при старте: истекшие резервы возвращаются на остаток.
+
+    Счетчики живут в одном процессе, поэтому приложение запускается одним воркером uvicorn.
+    """
+
+    def __init__(self, session_maker=async_session_maker):
+        self.session_maker = session_maker
+        self.available: Dict[int, int] = {}
+        self.reservations: Dict[str, Reservation] = {}
+        self._new: List[Reservation] = []
+        self._released: List[Reservation] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_hot(self, product_id: int) -> bool:
+        return product_id in self.available
+
+    def reserve(self, user_id: int, product_id: int, quantity: int) -> Optional[Reservation]:
+        """Зарезервировать товар; None, если остатка не хватает"""
+        if self.available.get(product_id, 0) < quantity:
+            return None
+        self.available[product_id] -= quantity
+        reservation = Reservation(
+            id=uuid.uuid4().hex,
+            product_id=product_id,
+            user_id=user_id,
+            quantity=quantity,
+            expires_at=datetime.utcnow() + timedelta(seconds=RESERVATION_TTL_SECONDS)
+        )
+        self.reservations[reservation.id] = reservation
+        self._new.append(reservation)
+        return reservation
+
+    def cancel(self, reservation: Reservation):
+        """Отменить резерв и вернуть товар на остаток"""
+        self.reservations.pop(reservation.id, None)
+        if reservation.product_id in self.available:
+            self.available[reservation.product_id] += reservation.quantity
+        if reservation in self._new:
+            self._new.remove(reservation)
+        else:
+            # Записан или записывается сейчас: остаток вернется следующим сбросом
+            self._released.append(reservation)
+
+    def claim(self, reservation: Reservation):
+        """Забрать записанный резерв для оформления заказа (остаток уже списан)"""
+        self.reservations.pop(reservation.id, None)
+
+    def unclaim(self, reservation: Reservation):
+        """Вернуть резерв, если оформление заказа не удалось"""
+        self.reservations[reservation.id] = reservation
+
+    def take(self, requested: Dict[int, int]) -> bool:
+        """Списать горячие позиции обычного заказа со счетчиков (все или ничего)"""
+        if any(self.available.get(product_id, 0) < quantity for product_id, quantity in requested.items()):
+            return False
+        for product_id, quantity in requested.items():
+            self.available[product_id] -= quantity
+        return True
+
+    def give_back(self, requested: Dict[int, int]):
+        for product_id, quantity in requested.items():
+            if product_id in self.available:
+                self.available[product_id] += quantity
+
+    def forget(self, product_id: int):
+        """Забыть удаленный товар: счетчик и его резервы (журнал закрыт close_reservations)"""
+        self.available.pop(product_id, None)
+        self.reservations = {
+            reservation_id: reservation for reservation_id, reservation in self.reservations.items()
+            if reservation.product_id != product_id
+        }
+        self._new = [r for r in self._new if r.product_id != product_id]
+        self._released = [r for r in self._released if r.product_id != product_id]
+
+    def _pending_delta(self, product_id: int) -> int:
+        """Насколько остаток в products разойдется со счетчиком после записи накопленного"""
+        return (
+            sum(r.quantity for r in self._new if r.product_id == product_id)
+            - sum(r.quantity for r in self._released if r.product_id == product_id)
+        )
+
+    async def reload(self, product_ids: Iterable[int]):
+        """Перечитать признак и остаток товаров из базы (после изменения продавцом)"""
+        async with self._lock:
+            async with self.session_maker() as db:
+                await self._load(db, list(product_ids))
+
+    async def _load(self, db: AsyncSession, product_ids: List[int]):
+        result = await db.execute(
+            select(Product.id, Product.quantity, Product.is_hot).where(Product.id.in_(product_ids))
+        )
+        rows = {row.id: row for row in result}
+        for product_id in product_ids:
+            row = rows.get(product_id)
+            if row is None or not row.is_hot:
+                self.available.pop(product_id, None)
+            else:
+                self.available[product_id] = max(row.quantity - self._pending_delta(product_id), 0)
+
+    async def flush(self):
+        """Записать принятые и отмененные резервы одной транзакцией"""
+        async with self._lock:
+            now = datetime.utcnow()
+            for reservation in [r for r in self.reservations.values() if r.expires_at <= now]:
+                self.cancel(reservation)
+
+            new, released = self._new, self._released
+            if not new and not released:
+                return
+            self._new, self._released = [], []
+
+            async with self.session_maker() as db:
+                try:
+                    failed, quantities = await self._write(db, new, released)
+                except Exception:
+                    await db.rollback()
+                    self._requeue(new, released)
+                    logger.exception("Inventory flush failed")
+                    return
+
+                if failed:
+                    # Остатка в базе не хватило (товар изменили или удалили в обход счетчика):
+                    # незаписанные резервы этих товаров отменяются, счетчики перечитываются
+                    await db.rollback()
+                    for reservation in new:
+                        if reservation.product_id in failed:
+                            self.reservations.pop(reservation.id, None)
+                    self._requeue([r for r in new if r.product_id not in failed], released)
+                    self._released = [
+                        r for r in self._released if r.journaled or r.product_id not in failed
+                    ]
+                    logger.warning("Inventory flush rejected reservations for products %s", sorted(failed))
+                    await self._load(db, list(failed))
+                    return
+
+                await db.commit()
+                for reservation in new:
+                    reservation.journaled = True
+                product_events.publish([
+                    {"id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()
+                ])
+
+    def _requeue(self, new: List[Reservation], released: List[Reservation]):
+        """Вернуть в очередь то, что не удалось записать"""
+        self._new = new + self._new
+        self._released = released + self._released
+        # Резерв отменили, пока его запись не удалась: он не попадал в базу, списывать и возвращать нечего
+        dropped = [r for r in self._released if not r.journaled and r in self._new]
+        for reservation in dropped:
+            self._new.remove(reservation)
+            self._released.remove(reservation)
+
+    async def _write(
+        self,
+        db: AsyncSession,
+        new: List[Reservation],
+        released: List[Reservation]
+    ) -> Tuple[set, Dict[int, int]]:
+        """Журнал и остатки товаров; вернуть товары, остатка которых не хватило, и новые остатки"""
+        delta: Dict[int, int] = {}
+        for reservation in new:
+            delta[reservation.product_id] = delta.get(reservation.product_id, 0) + reservation.quantity
+        if released:
+            # Возвращается только то, что в журнале еще держится (не оформлено в заказ)
+            result = await db.execute(
+                update(InventoryReservation)
+                .where(InventoryReservation.id.in_([r.id for r in released]), InventoryReservation.status == "held")
+                .values(status="expired")
+                .returning(InventoryReservation.product_id, InventoryReservation.quantity)
+            )
+            for row in result:
+                delta[row.product_id] = delta.get(row.product_id, 0) - row.quantity
+        changed = {product_id: value for product_id, value in delta.items() if value}
+        quantities = {}
+        if changed:
+            # Списание одним UPDATE; условие не дает увести остаток в минус
+            value = case(changed, value=Product.id)
+            result = await db.execute(
+                update(Product)
+                .where(Product.id.in_(changed), Product.quantity >= value)
+                .values(quantity=Product.quantity - value)
+                .returning(Product.id, Product.quantity)
+                .execution_options(synchronize_session=False)
+            )
+            quantities = {row.id: row.quantity for row in result}
+            failed = set(changed) - set(quantities)
+            if failed:
+                return failed, {}
+            # Остатки в каталоге изменились: кэшированные ответы и ETag устаревают
+            await bump_catalog_version(db)
+        if new:
+            await db.execute(insert(InventoryReservation), [
+                {
+                    "id": r.id,
+                    "product_id": r.product_id,
+                    "user_id": r.user_id,
+                    "quantity": r.quantity,
+                    "status": "held",
+                    "expires_at": r.expires_at
+                }
+                for r in new
+            ])
+        return set(), quantities
+
+    async def reconcile(self):
+        """Разобрать журнал после перезапуска и загрузить счетчики горячих товаров"""
+        async with self.session_maker() as db:
+            # Истекшие резервы закрываются и возвращаются на остаток одной транзакцией
+            result = await db.execute(
+                update(InventoryReservation)
+                .where(InventoryReservation.status == "held", InventoryReservation.expires_at <= datetime.utcnow())
+                .values(status="expired")
+                .returning(InventoryReservation.product_id, InventoryReservation.quantity)
+            )
+            returned: Dict[int, int] = {}
+            for row in result:
+                returned[row.product_id] = returned.get(row.product_id, 0) + row.quantity
+            quantities = {}
+            if returned:
+                result = await db.execute(
+                    update(Product)
+                    .where(Product.id.in_(returned))
+                    .values(quantity=Product.quantity + case(returned, value=Product.id))
+                    .returning(Product.id, Product.quantity)
+                    .execution_options(synchronize_session=False)
+                )
+                quantities = {row.id: row.quantity for row in result}
+                await bump_catalog_version(db)
+            await db.commit()
+            product_events.publish([
+                {"id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()
+            ])
+
+            held = await db.execute(select(InventoryReservation).where(InventoryReservation.status == "held"))
+            self.reservations = {
+                row.id: Reservation(
+                    id=row.id,
+                    product_id=row.product_id,
+                    user_id=row.user_id,
+                    quantity=row.quantity,
+                    expires_at=row.expires_at,
+                    journaled=True
+                )
+                for row in held.scalars()
+            }
+            hot = await db.execute(select(Product.id, Product.quantity).where(Product.is_hot.is_(True)))
+            self.available = {row.id: row.quantity for row in hot}
+
+    async def start(self):
+        await self.reconcile()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(INVENTORY_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Inventory flush failed")
+
+
+async def close_reservations(db: AsyncSession, product_id: int):
+    """Закрыть резервы удаляемого товара в журнале (в текущей транзакции).
+
+    Остаток возвращать некуда; оформленные резервы остаются историей заказов.
+    """
+    await db.execute(
+        update(InventoryReservation)
+        .where(InventoryReservation.product_id == product_id, InventoryReservation.status == "held")
+        .values(status="expired")
+    )
+
+
+inventory = InventoryManager()
@@ -1,77 +1,144 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
-from database import init_db
-from routers import auth, products, orders, commissions
+from auth import hash_executor
+from database import engine, read_engine, writer_engine, run_migrations
+from outbox import outbox_worker
+from inventory import inventory
+from group_commit import group_writer
+from events import product_events
+from popularity import sales_decay_job
+from settings import settings
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+from compression import JSONCompressionMiddleware
+from frontend import Frontend
+from routers import auth, products, orders, commissions, reservations, batch
 
-templates = Jinja2Templates(directory="templates")
+# Страницы без серверных данных: рендерятся и сжимаются один раз при старте
+frontend = Frontend(templates_dir="templates", static_dir="static")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    # Схема базы создается миграциями (python main.py --migrate), а не при старте воркеров
+    # Первое подключение инициализирует диалект под блокировкой потока; делаем его
+    # до запуска фоновой задачи, чтобы она не делила эту инициализацию с запросами
+    async with engine.connect():
+        pass
+    outbox_worker.start()
+    await inventory.start()
+    if settings.group_commit:
+        group_writer.start()
+    product_events.start()
+    sales_decay_job.start()
     yield
+    await sales_decay_job.stop()
+    await product_events.stop()
+    await group_writer.stop()
+    # Принятые резервы записываются в журнал; необработанные события остаются
+    # в outbox и будут разобраны при следующем запуске
+    await inventory.stop()
+    await outbox_worker.stop()
+    hash_executor.shutdown(wait=False)
+    await read_engine.dispose()
+    await writer_engine.dispose()
+    await engine.dispose()
 
 
 app = FastAPI(
     title="Marketplace API",
     description="API маркетплейса",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Ответы из моделей и словарей кодируются orjson; горячие маршруты
+    # отдают готовые байты через serialization.py
+    default_response_class=ORJSONResponse
 )
 
+# gzip для крупных JSON-ответов; метрики снаружи, их время включает сжатие
+app.add_middleware(JSONCompressionMiddleware, minimum_size=settings.gzip_min_size)
+# Метрики: латентность по маршрутам, число запросов к базе и время в ней
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine, "write")
+instrument_engine(read_engine, "read")
+instrument_engine(writer_engine, "group_commit")
+
 # Подключение роутеров
 app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(orders.router)
 app.include_router(commissions.router)
+app.include_router(reservations.router)
+app.include_router(batch.router)
+
+
+@app.get("/api/outbox/metrics")
+async def outbox_metrics():
+    """Получить длину очереди outbox, ее отставание и счетчики воркера"""
+    return await outbox_worker.metrics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Метрики приложения в текстовом формате Prometheus"""
+    return PlainTextResponse(await render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/static/{path:path}", include_in_schema=False)
+async def static_asset(path: str, request: Request):
+    """Ассет с хешем содержимого в имени (кэшируется клиентом навсегда)"""
+    return frontend.asset(request, path)
 
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     #Главная страница
-    return templates.TemplateResponse("index.html", {"request": request})
+    return frontend.page(request, "index.html")
 
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     #Страница входа
-    return templates.TemplateResponse("login.html", {"request": request})
+    return frontend.page(request, "login.html")
 
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     #Страница регистрации
-    return templates.TemplateResponse("register.html", {"request": request})
+    return frontend.page(request, "register.html")
 
 
 @app.get("/products", response_class=HTMLResponse)
 async def products_page(request: Request):
     #Страница каталога товаров
-    return templates.TemplateResponse("products.html", {"request": request})
+    return frontend.page(request, "products.html")
 
 
 @app.get("/my-products", response_class=HTMLResponse)
 async def my_products_page(request: Request):
     #Страница моих товаров (для продавцов)
-    return templates.TemplateResponse("my_products.html", {"request": request})
+    return frontend.page(request, "my_products.html")
 
 
 @app.get("/orders", response_class=HTMLResponse)
 async def orders_page(request: Request):
     #Страница заказов
-    return templates.TemplateResponse("orders.html", {"request": request})
+    return frontend.page(request, "orders.html")
 
 
 @app.get("/commissions", response_class=HTMLResponse)
 async def commissions_page(request: Request):
     #Страница комиссий (для продавцов)
-    return templates.TemplateResponse("commissions.html", {"request": request})
+    return frontend.page(request, "commissions.html")
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import sys
+    
+    if "--migrate" in sys.argv:
+        run_migrations()
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,235 @@
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+import auth
+from catalog_cache import response_cache
+from group_commit import group_writer
+from events import product_events
+from inventory import inventory
+from outbox import outbox_worker
+
+# Границы гистограмм: длительность в секундах и число запросов к базе на HTTP-запрос
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счетчик с метками"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами, как ее ожидает Prometheus"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счетчики по корзинам (последняя +Inf), сумма]
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def _family(
+    name: str,
+    metric_type: str,
+    documentation: str,
+    samples: List[Tuple[Labels, float]],
+    labelnames: Sequence[str] = ()
+) -> List[str]:
+    """Метрика, значения которой снимаются в момент запроса /metrics"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return lines
+
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "Database queries per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_queries_total = Counter("db_queries_total", "Executed SQL statements", ("engine",))
+db_query_seconds_total = Counter("db_query_seconds_total", "Time spent executing SQL statements", ("engine",))
+
+COLLECTORS = (http_requests_total, http_request_duration, http_request_db_queries, db_queries_total, db_query_seconds_total)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+
+
+# Счетчики текущего HTTP-запроса; у фоновых задач (outbox, inventory) - None
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine, name: str):
+    """Считать запросы и время в базе для движка (в целом и для текущего HTTP-запроса)"""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries_total.inc((name,))
+        db_query_seconds_total.inc((name,), elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность и коды ответов по маршрутам, заголовки X-DB-Queries и X-DB-Time (мс)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Подзапрос пакета (routers/batch.py) считается и сам по себе, и в пакете
+        parent = _request_stats.get()
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_db_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(stats.queries))
+                headers.append("X-DB-Time", f"{stats.db_time * 1000:.3f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_db_headers)
+        finally:
+            _request_stats.reset(token)
+            if parent is not None:
+                parent.queries += stats.queries
+                parent.db_time += stats.db_time
+            # Шаблон пути маршрута, а не сам путь: /api/products/{product_id}, а не /api/products/42
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            http_requests_total.inc(labels + (str(status_code),))
+            http_request_duration.observe(labels, time.perf_counter() - started)
+            http_request_db_queries.observe(labels, stats.queries)
+
+
+async def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for collector in COLLECTORS:
+        lines += collector.render()
+
+    caches = {"catalog_response": response_cache, "token": auth.token_cache, "user": auth.user_cache}
+    lines += _family("cache_entries", "gauge", "Entries in in-process caches",
+                     [((name,), len(cache)) for name, cache in caches.items()], ("cache",))
+    lines += _family("cache_hits_total", "counter", "In-process cache hits",
+                     [((name,), cache.hits) for name, cache in caches.items()], ("cache",))
+    lines += _family("cache_misses_total", "counter", "In-process cache misses",
+                     [((name,), cache.misses) for name, cache in caches.items()], ("cache",))
+
+    outbox = await outbox_worker.metrics()
+    lines += _family("outbox_pending_events", "gauge", "Outbox events waiting to be processed",
+                     [((), outbox["pending"])])
+    lines += _family("outbox_dead_events", "gauge", "Outbox events that exhausted their retries",
+                     [((), outbox["dead"])])
+    lines += _family("outbox_lag_seconds", "gauge", "Age of the oldest pending outbox event",
+                     [((), outbox["lag_seconds"])])
+    lines += _family("outbox_processed_total", "counter", "Processed outbox events",
+                     [((), outbox["processed_total"])])
+    lines += _family("outbox_failed_total", "counter", "Failed outbox event attempts",
+                     [((), outbox["failed_total"])])
+
+    lines += _family("inventory_hot_products", "gauge", "Products with in-memory stock counters",
+                     [((), len(inventory.available))])
+    lines += _family("inventory_reservations", "gauge", "Reservations held in memory",
+                     [((), len(inventory.reservations))])
+    lines += _family("group_commit_batches_total", "counter", "Group commit transactions",
+                     [((), group_writer.batches_total)])
+    lines += _family("group_commit_units_total", "counter", "Write units applied by the group commit writer",
+                     [((), group_writer.units_total)])
+    lines += _family("product_event_subscribers", "gauge", "Open product event streams",
+                     [((), len(product_events.subscribers))])
+    lines += _family("product_events_published_total", "counter", "Product change events published",
+                     [((), product_events.published_total)])
+    lines += _family("product_event_resyncs_total", "counter", "Subscriber queue overflows answered with resync",
+                     [((), product_events.resyncs_total)])
+    lines += _family("password_hash_queue", "gauge", "Password hashing jobs queued or running",
+                     [((), auth.hash_queue_length())])
+    return "\n".join(lines) + "\n"
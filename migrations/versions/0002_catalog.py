@@ -0,0 +1,57 @@
+"""catalog: product filter/sort indexes, catalog version, FTS5 search index
+
+Revision ID: 0002_catalog
+Revises: 0001_baseline
+Create Date: 2026-10-16 12:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_catalog"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRODUCT_INDEXES = [
+    ("ix_products_seller_id_id", ["seller_id", "id"]),
+    ("ix_products_price_id", ["price", "id"]),
+    ("ix_products_created_at_id", ["created_at", "id"]),
+    ("ix_products_seller_id_price_id", ["seller_id", "price", "id"]),
+    ("ix_products_seller_id_name_id", ["seller_id", "name", "id"]),
+]
+
+
+def upgrade() -> None:
+    # if_not_exists: базы, созданные через create_all, уже могут содержать эти объекты
+    for name, columns in PRODUCT_INDEXES:
+        op.create_index(name, "products", columns, if_not_exists=True)
+
+    if not sa.inspect(op.get_bind()).has_table("catalog_state"):
+        op.create_table(
+            "catalog_state",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+        "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute("DELETE FROM products_fts")
+    op.execute(
+        "INSERT INTO products_fts (rowid, name, description) "
+        "SELECT id, name, coalesce(description, '') FROM products"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS products_fts")
+    op.drop_table("catalog_state")
+    for name, _ in reversed(PRODUCT_INDEXES):
+        op.drop_index(name, table_name="products")
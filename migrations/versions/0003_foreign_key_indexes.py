@@ -0,0 +1,37 @@
+"""indexes on foreign keys used by order and commission lookups
+
+Revision ID: 0003_foreign_key_indexes
+Revises: 0002_catalog
+Create Date: 2026-10-16 12:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_foreign_key_indexes"
+down_revision: Union[str, None] = "0002_catalog"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # История заказов покупателя: WHERE buyer_id = ? ORDER BY id DESC
+    ("ix_orders_buyer_id_id", "orders", ["buyer_id", "id"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_order_items_product_id", "order_items", ["product_id"]),
+    # Комиссии продавца: WHERE seller_id = ? ORDER BY id
+    ("ix_commissions_seller_id_id", "commissions", ["seller_id", "id"]),
+    ("ix_commissions_order_id", "commissions", ["order_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
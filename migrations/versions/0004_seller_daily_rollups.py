@@ -0,0 +1,42 @@
+"""seller daily earnings rollups, filled from the commissions ledger
+
+Revision ID: 0004_seller_daily_rollups
+Revises: 0003_foreign_key_indexes
+Create Date: 2026-10-16 12:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_seller_daily_rollups"
+down_revision: Union[str, None] = "0003_foreign_key_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "seller_daily_rollups",
+        sa.Column("seller_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("gross", sa.Float(), nullable=False),
+        sa.Column("commission", sa.Float(), nullable=False),
+        sa.Column("net", sa.Float(), nullable=False),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["seller_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("seller_id", "day"),
+    )
+    op.execute(
+        "INSERT INTO seller_daily_rollups (seller_id, day, gross, commission, net, order_count) "
+        "SELECT seller_id, date(created_at), sum(amount), sum(commission_amount), "
+        "sum(seller_amount), count(DISTINCT order_id) "
+        "FROM commissions GROUP BY seller_id, date(created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("seller_daily_rollups")
@@ -0,0 +1,32 @@
+"""indexes for date-range exports of orders and commissions
+
+Revision ID: 0005_export_date_indexes
+Revises: 0004_seller_daily_rollups
+Create Date: 2026-10-16 12:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_export_date_indexes"
+down_revision: Union[str, None] = "0004_seller_daily_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_orders_buyer_id_created_at", "orders", ["buyer_id", "created_at"]),
+    ("ix_commissions_seller_id_created_at", "commissions", ["seller_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
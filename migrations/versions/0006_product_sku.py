@@ -0,0 +1,29 @@
+"""seller SKU on products, unique per seller (bulk import upserts)
+
+Revision ID: 0006_product_sku
+Revises: 0005_export_date_indexes
+Create Date: 2026-10-16 12:50:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_product_sku"
+down_revision: Union[str, None] = "0005_export_date_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("sku", sa.String(), nullable=True))
+    op.create_index("ux_products_seller_id_sku", "products", ["seller_id", "sku"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_products_seller_id_sku", table_name="products")
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.drop_column("sku")
@@ -0,0 +1,47 @@
+"""hot products and the inventory reservation journal
+
+Revision ID: 0008_inventory_reservations
+Revises: 0007_outbox_events
+Create Date: 2026-10-16 13:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_inventory_reservations"
+down_revision: Union[str, None] = "0007_outbox_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("is_hot", sa.Boolean(), server_default="0", nullable=False))
+    op.create_table(
+        "inventory_reservations",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_inventory_reservations_status_expires_at",
+        "inventory_reservations",
+        ["status", "expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_reservations_status_expires_at", table_name="inventory_reservations")
+    op.drop_table("inventory_reservations")
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.drop_column("is_hot")
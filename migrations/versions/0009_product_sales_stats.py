@@ -0,0 +1,87 @@
+"""product sales stats for the popularity ranking, filled from order items
+
+Revision ID: 0009_product_sales_stats
+Revises: 0008_inventory_reservations
+Create Date: 2026-10-16 13:20:00
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_product_sales_stats"
+down_revision: Union[str, None] = "0008_inventory_reservations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Периоды полураспада очков, как в popularity.HALF_LIFE_DAYS
+HALF_LIFE_DAYS = (7, 30)
+
+
+def upgrade() -> None:
+    op.add_column("catalog_state", sa.Column("sales_decayed_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        "product_sales_stats",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("score_7d", sa.Float(), nullable=False),
+        sa.Column("score_30d", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index("ix_product_sales_stats_score_7d", "product_sales_stats", ["score_7d", "product_id"])
+    op.create_index("ix_product_sales_stats_score_30d", "product_sales_stats", ["score_30d", "product_id"])
+    op.create_index("ix_product_sales_stats_units_sold", "product_sales_stats", ["units_sold", "product_id"])
+
+    op.execute(
+        "INSERT INTO product_sales_stats (product_id, units_sold, revenue, score_7d, score_30d) "
+        "SELECT p.id, coalesce(sum(oi.quantity), 0), coalesce(sum(oi.quantity * oi.price), 0), 0, 0 "
+        "FROM products p LEFT JOIN order_items oi ON oi.product_id = p.id GROUP BY p.id"
+    )
+
+    # Очки с затуханием от даты заказа считаются в Python: pow() есть не во всех сборках SQLite
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    since = now - timedelta(days=max(HALF_LIFE_DAYS) * 10)
+    rows = bind.execute(
+        sa.text(
+            "SELECT oi.product_id, oi.quantity, o.created_at FROM order_items oi "
+            "JOIN orders o ON o.id = oi.order_id WHERE o.created_at >= :since"
+        ),
+        {"since": since.isoformat(sep=" ")}
+    )
+    scores = defaultdict(lambda: [0.0, 0.0])
+    for product_id, quantity, created_at in rows:
+        elapsed = max((now - datetime.fromisoformat(str(created_at))).total_seconds(), 0.0)
+        for index, half_life in enumerate(HALF_LIFE_DAYS):
+            scores[product_id][index] += quantity * 0.5 ** (elapsed / (half_life * 86400))
+    if scores:
+        bind.execute(
+            sa.text(
+                "UPDATE product_sales_stats SET score_7d = :score_7d, score_30d = :score_30d "
+                "WHERE product_id = :product_id"
+            ),
+            [
+                {"product_id": product_id, "score_7d": score_7d, "score_30d": score_30d}
+                for product_id, (score_7d, score_30d) in scores.items()
+            ]
+        )
+    bind.execute(
+        sa.text("UPDATE catalog_state SET sales_decayed_at = :now"),
+        {"now": now.isoformat(sep=" ")}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_sales_stats_units_sold", table_name="product_sales_stats")
+    op.drop_index("ix_product_sales_stats_score_30d", table_name="product_sales_stats")
+    op.drop_index("ix_product_sales_stats_score_7d", table_name="product_sales_stats")
+    op.drop_table("product_sales_stats")
+    with op.batch_alter_table("catalog_state") as batch_op:
+        batch_op.drop_column("sales_decayed_at")
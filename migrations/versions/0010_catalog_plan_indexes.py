@@ -0,0 +1,28 @@
+"""catalog indexes for in_stock and seller newest ordering
+
+Revision ID: 0010_catalog_plan_indexes
+Revises: 0009_product_sales_stats
+Create Date: 2026-10-16 13:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_catalog_plan_indexes"
+down_revision: Union[str, None] = "0009_product_sales_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_products_in_stock_id", "products", ["id"], sqlite_where=sa.text("quantity > 0"))
+    op.create_index("ix_products_seller_id_created_at_id", "products", ["seller_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_seller_id_created_at_id", table_name="products")
+    op.drop_index("ix_products_in_stock_id", table_name="products")
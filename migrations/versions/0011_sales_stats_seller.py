@@ -0,0 +1,35 @@
+"""seller of each product in sales stats for the per-seller popular ordering
+
+Revision ID: 0011_sales_stats_seller
+Revises: 0010_catalog_plan_indexes
+Create Date: 2026-10-16 13:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_sales_stats_seller"
+down_revision: Union[str, None] = "0010_catalog_plan_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("product_sales_stats", sa.Column("seller_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE product_sales_stats SET seller_id = "
+        "(SELECT p.seller_id FROM products p WHERE p.id = product_sales_stats.product_id)"
+    )
+    op.create_index(
+        "ix_product_sales_stats_seller_id_score_7d", "product_sales_stats", ["seller_id", "score_7d", "product_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_sales_stats_seller_id_score_7d", table_name="product_sales_stats")
+    with op.batch_alter_table("product_sales_stats") as batch_op:
+        batch_op.drop_column("seller_id")
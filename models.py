@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date, DateTime, Text, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from database import Base
 
 
@@ -28,12 +28,27 @@ class Product(Base):
     price = Column(Float, nullable=False)
     quantity = Column(Integer, default=0)
     seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    sku = Column(String, nullable=True)  # артикул продавца, уникален в пределах продавца
+    is_hot = Column(Boolean, nullable=False, default=False, server_default="0")  # остаток ведет inventory.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     seller = relationship("User", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
 
+    # Индексы под фильтры и сортировки каталога (см. routers/products.PRODUCT_SORTS)
+    __table_args__ = (
+        Index("ix_products_seller_id_id", "seller_id", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_seller_id_created_at_id", "seller_id", "created_at", "id"),
+        Index("ix_products_seller_id_price_id", "seller_id", "price", "id"),
+        Index("ix_products_seller_id_name_id", "seller_id", "name", "id"),
+        Index("ux_products_seller_id_sku", "seller_id", "sku", unique=True),
+        # in_stock: только товары с остатком, в порядке id
+        Index("ix_products_in_stock_id", "id", sqlite_where=text("quantity > 0")),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -49,13 +64,18 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     commissions = relationship("Commission", back_populates="order")
 
+    __table_args__ = (
+        Index("ix_orders_buyer_id_id", "buyer_id", "id"),
+        Index("ix_orders_buyer_id_created_at", "buyer_id", "created_at"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
 
@@ -67,7 +87,7 @@ class Commission(Base):
     __tablename__ = "commissions"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)
     commission_rate = Column(Float, nullable=False)
@@ -78,3 +98,92 @@ class Commission(Base):
     order = relationship("Order", back_populates="commissions")
     seller = relationship("User")
 
+    __table_args__ = (
+        Index("ix_commissions_seller_id_id", "seller_id", "id"),
+        Index("ix_commissions_seller_id_created_at", "seller_id", "created_at"),
+    )
+
+
+
+class CatalogState(Base):
+    __tablename__ = "catalog_state"
+
+    # Единственная строка (id = 1) с версией каталога: увеличивается при
+    # любом изменении товаров и используется для ETag и кэша ответов
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Когда popularity.py последний раз применял затухание к рейтингу продаж
+    sales_decayed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SellerDailyRollup(Base):
+    __tablename__ = "seller_daily_rollups"
+
+    # Дневные итоги продавца, обновляются в транзакции создания заказа
+    # и пересчитываются из commissions командой python rollups.py
+    seller_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    gross = Column(Float, nullable=False, default=0.0)
+    commission = Column(Float, nullable=False, default=0.0)
+    net = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class ProductSalesStats(Base):
+    __tablename__ = "product_sales_stats"
+
+    # Продажи товара для рейтинга популярности: строка на каждый товар.
+    # Пополняется воркером outbox из созданных заказов, очки за 7 и 30 дней
+    # периодически затухают (popularity.py); пересчет - python popularity.py
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    # Продавец товара (копия products.seller_id) - для рейтинга в пределах продавца;
+    # NULL, если товар удалили до учета его продажи
+    seller_id = Column(Integer, nullable=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    score_7d = Column(Float, nullable=False, default=0.0)
+    score_30d = Column(Float, nullable=False, default=0.0)
+
+    # Рейтинг читается по индексу от большего к меньшему (см. routers/products)
+    __table_args__ = (
+        Index("ix_product_sales_stats_score_7d", "score_7d", "product_id"),
+        Index("ix_product_sales_stats_seller_id_score_7d", "seller_id", "score_7d", "product_id"),
+        Index("ix_product_sales_stats_score_30d", "score_30d", "product_id"),
+        Index("ix_product_sales_stats_units_sold", "units_sold", "product_id"),
+    )
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    # Работа после коммита (журнал комиссий, итоги продавцов, сброс кэша каталога).
+    # Пишется в транзакции исходного изменения и удаляется воркером outbox.py после обработки
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_outbox_events_available_at_id", "available_at", "id"),
+    )
+
+
+class InventoryReservation(Base):
+    __tablename__ = "inventory_reservations"
+
+    # Журнал резервов "горячих" товаров (inventory.py): остаток товара уже уменьшен
+    # на quantity, пока резерв held; при истечении возвращается, при оформлении - consumed
+    id = Column(String(32), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="held")  # held, consumed, expired
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_inventory_reservations_status_expires_at", "status", "expires_at"),
+    )
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_cache import bump_catalog_version
+from database import async_session_maker
+from models import Commission, OutboxEvent
+from popularity import add_sales
+from rollups import add_to_rollups
+
+# Сколько событий обрабатывается в одной транзакции
+OUTBOX_BATCH_SIZE = 200
+# Пауза между опросами, если никто не разбудил воркер раньше
+OUTBOX_POLL_INTERVAL_SECONDS = 1.0
+# После стольких неудач событие остается в таблице и больше не выбирается
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_BASE_SECONDS = 1.0
+OUTBOX_RETRY_MAX_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+# topic -> обработчик пачки payload; выполняется в одной транзакции с удалением событий
+Handler = Callable[[AsyncSession, List[dict]], Awaitable[None]]
+handlers: Dict[str, Handler] = {}
+
+
+def outbox_handler(topic: str):
+    """Зарегистрировать обработчик событий темы"""
+    def register(handler: Handler) -> Handler:
+        handlers[topic] = handler
+        return handler
+    return register
+
+
+def enqueue(db: AsyncSession, topic: str, payload: dict):
+    """Записать событие в outbox в текущей транзакции"""
+    db.add(OutboxEvent(topic=topic, payload=json.dumps(payload), attempts=0))
+
+
+@outbox_handler("order_created")
+async def record_order_commissions(db: AsyncSession, payloads: List[dict]):
+    """Журнал комиссий, дневные итоги продавцов и продажи товаров по созданным заказам"""
+    commissions_data = []
+    sold_items = []
+    for payload in payloads:
+        created_at = datetime.fromisoformat(payload["created_at"])
+        rows = [{**commission, "created_at": created_at} for commission in payload["commissions"]]
+        commissions_data.extend(rows)
+        await add_to_rollups(db, rows, created_at.date())
+        # События, записанные до появления рейтинга продаж, позиций не содержат
+        sold_items.extend(payload.get("items", []))
+    if commissions_data:
+        await db.execute(insert(Commission), commissions_data)
+    await add_sales(db, sold_items)
+    # Остатки товаров изменились: одна новая версия каталога на всю пачку заказов
+    await bump_catalog_version(db)
+
+
+async def _handle(db: AsyncSession, events: List) -> None:
+    for topic, group in groupby(events, key=lambda event: event.topic):
+        handler = handlers.get(topic)
+        if handler is None:
+            raise LookupError(f"No outbox handler for topic {topic}")
+        await handler(db, [json.loads(event.payload) for event in group])
+
+
+class OutboxWorker:
+    """Фоновая задача, которая разбирает outbox пачками.
+
+    Событие удаляется тем же DELETE ... RETURNING, в транзакции которого
+    выполняется обработчик: при ошибке откатывается все вместе и событие
+    будет обработано повторно, а несколько воркеров не возьмут его дважды.
+    """
+
+    def __init__(self, session_maker=async_session_maker, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.processed_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+        self.last_batch_seconds = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        """Разбудить воркер после коммита с новыми событиями"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox batch failed")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), OUTBOX_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def drain_once(self) -> int:
+        """Обработать одну пачку готовых событий; вернуть их количество"""
+        async with self.session_maker() as db:
+            result = await db.execute(
+                select(OutboxEvent.id)
+                .where(OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS, OutboxEvent.available_at <= func.now())
+                .order_by(OutboxEvent.available_at, OutboxEvent.id)
+                .limit(self.batch_size)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                events = await self._claim(db, ids)
+                await _handle(db, events)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                logger.warning("Outbox batch of %d events failed, retrying one by one", len(ids), exc_info=True)
+                for event_id in ids:
+                    await self._process_single(event_id)
+                return len(ids)
+
+            self.processed_total += len(events)
+            self.batches_total += 1
+            self.last_batch_seconds = time.perf_counter() - started
+            return len(ids)
+
+    async def _claim(self, db: AsyncSession, ids: List[int]) -> List:
+        result = await db.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .returning(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload)
+        )
+        return sorted(result.all(), key=lambda event: ids.index(event.id))
+
+    async def _process_single(self, event_id: int):
+        """Обработать событие отдельно; при ошибке отложить его с экспоненциальной задержкой"""
+        async with self.session_maker() as db:
+            try:
+                events = await self._claim(db, [event_id])
+                await _handle(db, events)
+                await db.commit()
+                self.processed_total += len(events)
+                return
+            except Exception as exc:
+                await db.rollback()
+                error = f"{type(exc).__name__}: {exc}"
+
+            attempts = await db.scalar(select(OutboxEvent.attempts).where(OutboxEvent.id == event_id))
+            if attempts is None:
+                return
+            delay = min(OUTBOX_RETRY_BASE_SECONDS * 2 ** attempts, OUTBOX_RETRY_MAX_SECONDS)
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == event_id)
+                .values(
+                    attempts=OutboxEvent.attempts + 1,
+                    last_error=error,
+                    available_at=datetime.utcnow() + timedelta(seconds=delay)
+                )
+            )
+            await db.commit()
+            self.failed_total += 1
+            logger.error("Outbox event %d failed (attempt %d): %s", event_id, attempts + 1, error)
+
+    async def metrics(self) -> dict:
+        """Длина очереди, возраст самого старого события и счетчики воркера"""
+        async with self.session_maker() as db:
+            row = (await db.execute(
+                select(
+                    func.count().filter(OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS).label("pending"),
+                    func.count().filter(OutboxEvent.attempts >= OUTBOX_MAX_ATTEMPTS).label("dead"),
+                    func.min(OutboxEvent.created_at).filter(OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS).label("oldest")
+                )
+            )).one()
+        lag = 0.0
+        if row.oldest is not None:
+            lag = max((datetime.utcnow() - row.oldest).total_seconds(), 0.0)
+        return {
+            "pending": row.pending,
+            "dead": row.dead,
+            "lag_seconds": round(lag, 3),
+            "processed_total": self.processed_total,
+            "failed_total": self.failed_total,
+            "batches_total": self.batches_total,
+            "last_batch_seconds": round(self.last_batch_seconds, 6)
+        }
+
+
+outbox_worker = OutboxWorker()
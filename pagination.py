@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_key: Any, last_id: int) -> str:
+    """Упаковать позицию (ключ сортировки, id) в непрозрачный курсор"""
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    payload = json.dumps([sort_key, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Распаковать курсор, полученный от encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise ValueError
+        # Ключ попадает в параметр сравнения: списки, объекты и null недопустимы
+        if not isinstance(sort_key, (str, int, float)) or isinstance(sort_key, bool):
+            raise ValueError
+    except (ValueError, TypeError):
+        _invalid_cursor()
+    return sort_key, last_id
+
+
+def _invalid_cursor():
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def _sort_key_for_column(sort_column, sort_key: Any) -> Any:
+    """Привести ключ из курсора к типу колонки сортировки; курсор от другой сортировки - 400"""
+    python_type = sort_column.type.python_type
+    if python_type is datetime:
+        # Даты в курсоре хранятся строкой ISO 8601 (см. encode_cursor)
+        if not isinstance(sort_key, str):
+            _invalid_cursor()
+        try:
+            return datetime.fromisoformat(sort_key)
+        except ValueError:
+            _invalid_cursor()
+    if python_type is float and isinstance(sort_key, int):
+        return float(sort_key)
+    if not isinstance(sort_key, python_type):
+        _invalid_cursor()
+    return sort_key
+
+
+def make_page(rows: Sequence, limit: int, sort_key: Optional[Callable[[Any], Any]] = None) -> dict:
+    """Обрезать выборку из limit + 1 строк до страницы и вычислить next_cursor"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_key(last) if sort_key else last.id, last.id)
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def apply_keyset(query, id_column, sort_column=None, descending: bool = False, cursor: Optional[str] = None):
+    """Упорядочить запрос по (sort_column, id) и продолжить его с позиции курсора.
+
+    Условие записано сравнением кортежей (sort_column, id) > (:key, :id), поэтому
+    SQLite ищет позицию по составному индексу, а не пропускает строки.
+    """
+    columns = [sort_column, id_column] if sort_column is not None else [id_column]
+    if cursor is not None:
+        sort_key, last_id = decode_cursor(cursor)
+        if sort_column is not None:
+            sort_key = _sort_key_for_column(sort_column, sort_key)
+            position, bound = tuple_(*columns), tuple_(sort_key, last_id)
+        else:
+            position, bound = id_column, last_id
+        query = query.where(position < bound if descending else position > bound)
+    return query.order_by(*[column.desc() if descending else column for column in columns])
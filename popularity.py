@@ -0,0 +1,227 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, delete, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_cache import bump_catalog_version
+from database import async_session_maker
+from models import CatalogState, Product, ProductSalesStats
+
+# Очки продаж затухают экспоненциально: продажа, сделанная период полураспада
+# назад, весит вдвое меньше сегодняшней. Окно рейтинга - период полураспада
+HALF_LIFE_DAYS = {"7d": 7, "30d": 30}
+# Как часто применяется затухание; продажи между запусками считаются сделанными
+# в момент прошлого запуска (ошибка меньше 0.2% веса за 15 минут)
+SALES_DECAY_INTERVAL_SECONDS = 900
+# Меньшие очки обнуляются, и товар выпадает из GET /api/products/top
+MIN_SCORE = 1e-3
+
+# Окно -> колонка рейтинга; "all" - все проданные штуки без затухания
+RANKING_COLUMNS = {
+    "7d": ProductSalesStats.score_7d,
+    "30d": ProductSalesStats.score_30d,
+    "all": ProductSalesStats.units_sold,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def decay_factor(elapsed: timedelta, half_life_days: float) -> float:
+    """Во сколько раз уменьшаются очки за elapsed"""
+    return 0.5 ** (elapsed.total_seconds() / (half_life_days * 86400))
+
+
+async def add_products(db: AsyncSession, seller_id: int, product_ids: Iterable[int]):
+    """Завести пустые строки продаж для новых товаров продавца (в текущей транзакции)"""
+    rows = [
+        {
+            "product_id": product_id,
+            "seller_id": seller_id,
+            "units_sold": 0,
+            "revenue": 0.0,
+            "score_7d": 0.0,
+            "score_30d": 0.0
+        }
+        for product_id in product_ids
+    ]
+    if not rows:
+        return
+    stmt = insert(ProductSalesStats).values(rows)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[ProductSalesStats.product_id]))
+
+
+async def remove_product(db: AsyncSession, product_id: int):
+    """Удалить строку продаж товара (в текущей транзакции)"""
+    await db.execute(delete(ProductSalesStats).where(ProductSalesStats.product_id == product_id))
+
+
+async def add_sales(db: AsyncSession, items: List[dict]):
+    """Добавить проданные позиции [{"product_id", "quantity", "price"}] к продажам товаров.
+
+    Позиции пачки заказов складываются по товару, и все товары обновляются одним
+    upsert. Очки растут на число штук без затухания - его применит decay_sales.
+    """
+    totals = defaultdict(lambda: [0, 0.0])
+    for item in items:
+        total = totals[item["product_id"]]
+        total[0] += item["quantity"]
+        total[1] += item["quantity"] * item["price"]
+    if not totals:
+        return
+    stmt = insert(ProductSalesStats).values([
+        {
+            "product_id": product_id,
+            # Строка обычно уже есть (add_products); иначе продавец берется из товара
+            "seller_id": select(Product.seller_id).where(Product.id == product_id).scalar_subquery(),
+            "units_sold": units,
+            "revenue": revenue,
+            "score_7d": float(units),
+            "score_30d": float(units)
+        }
+        for product_id, (units, revenue) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductSalesStats.product_id],
+        set_={
+            "units_sold": ProductSalesStats.units_sold + stmt.excluded.units_sold,
+            "revenue": ProductSalesStats.revenue + stmt.excluded.revenue,
+            "score_7d": ProductSalesStats.score_7d + stmt.excluded.score_7d,
+            "score_30d": ProductSalesStats.score_30d + stmt.excluded.score_30d
+        }
+    )
+    await db.execute(stmt)
+
+
+def _decayed(column, factor: float):
+    value = column * factor
+    return case((value < MIN_SCORE, 0.0), else_=value)
+
+
+async def decay_sales(db: AsyncSession, now: Optional[datetime] = None):
+    """Уменьшить очки всех товаров на время, прошедшее с прошлого затухания.
+
+    Множители считаются в Python, в базе - один UPDATE по товарам с ненулевыми
+    очками. Версия каталога увеличивается первой: запись берет блокировку до
+    чтения sales_decayed_at, поэтому два воркера не применят один интервал дважды.
+    """
+    now = now or datetime.utcnow()
+    # Порядок в рейтинге меняется - кэшированные страницы каталога устаревают
+    await bump_catalog_version(db)
+    decayed_at = await db.scalar(select(CatalogState.sales_decayed_at).where(CatalogState.id == 1))
+    if decayed_at is not None and now > decayed_at:
+        elapsed = now - decayed_at
+        await db.execute(
+            update(ProductSalesStats)
+            .where(ProductSalesStats.score_30d > 0)
+            .values(
+                score_7d=_decayed(ProductSalesStats.score_7d, decay_factor(elapsed, HALF_LIFE_DAYS["7d"])),
+                score_30d=_decayed(ProductSalesStats.score_30d, decay_factor(elapsed, HALF_LIFE_DAYS["30d"]))
+            )
+        )
+    await db.execute(update(CatalogState).where(CatalogState.id == 1).values(sales_decayed_at=now))
+
+
+class SalesDecayJob:
+    """Фоновая задача: затухание очков продаж раз в SALES_DECAY_INTERVAL_SECONDS.
+
+    Первый запуск - сразу при старте, чтобы затухание за время простоя
+    применилось до первых запросов рейтинга.
+    """
+
+    def __init__(self, session_maker=async_session_maker, interval: float = SALES_DECAY_INTERVAL_SECONDS):
+        self.session_maker = session_maker
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self):
+        async with self.session_maker() as db:
+            await decay_sales(db)
+            await db.commit()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Sales decay failed")
+            await asyncio.sleep(self.interval)
+
+
+sales_decay_job = SalesDecayJob()
+
+
+async def rebuild_sales_stats(conn, now: Optional[datetime] = None):
+    """Пересчитать продажи всех товаров из позиций заказов"""
+    now = now or datetime.utcnow()
+    await conn.execute(text("DELETE FROM product_sales_stats"))
+    await conn.execute(text(
+        "INSERT INTO product_sales_stats (product_id, seller_id, units_sold, revenue, score_7d, score_30d) "
+        "SELECT p.id, p.seller_id, coalesce(sum(oi.quantity), 0), coalesce(sum(oi.quantity * oi.price), 0), 0, 0 "
+        "FROM products p LEFT JOIN order_items oi ON oi.product_id = p.id GROUP BY p.id"
+    ))
+
+    # Очки с затуханием от даты заказа; заказы старше десяти периодов полураспада
+    # длинного окна весят меньше тысячной и не читаются
+    since = now - timedelta(days=HALF_LIFE_DAYS["30d"] * 10)
+    result = await conn.execute(
+        text(
+            "SELECT oi.product_id, oi.quantity, o.created_at FROM order_items oi "
+            "JOIN orders o ON o.id = oi.order_id WHERE o.created_at >= :since"
+        ),
+        {"since": since.isoformat(sep=" ")}
+    )
+    scores = defaultdict(lambda: [0.0, 0.0])
+    for product_id, quantity, created_at in result:
+        elapsed = max(now - datetime.fromisoformat(str(created_at)), timedelta(0))
+        score = scores[product_id]
+        score[0] += quantity * decay_factor(elapsed, HALF_LIFE_DAYS["7d"])
+        score[1] += quantity * decay_factor(elapsed, HALF_LIFE_DAYS["30d"])
+    if scores:
+        await conn.execute(
+            text(
+                "UPDATE product_sales_stats SET score_7d = :score_7d, score_30d = :score_30d "
+                "WHERE product_id = :product_id"
+            ),
+            [
+                {"product_id": product_id, "score_7d": score_7d, "score_30d": score_30d}
+                for product_id, (score_7d, score_30d) in scores.items()
+            ]
+        )
+    # Очки посчитаны на now: следующее затухание отсчитывается от него
+    await conn.execute(
+        text(
+            "INSERT INTO catalog_state (id, version, sales_decayed_at) VALUES (1, 1, :now) "
+            "ON CONFLICT (id) DO UPDATE SET version = version + 1, sales_decayed_at = :now"
+        ),
+        {"now": now.isoformat(sep=" ")}
+    )
+
+
+if __name__ == "__main__":
+    # Пересчет продаж из позиций заказов: python popularity.py
+    from database import engine
+
+    async def main():
+        async with engine.begin() as conn:
+            await rebuild_sales_stats(conn)
+        await engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import SellerDailyRollup
+
+
+async def add_to_rollups(db: AsyncSession, commissions_data: List[dict], day: Optional[date] = None):
+    """Добавить комиссии одного заказа к дневным итогам продавцов (в текущей транзакции)"""
+    if not commissions_data:
+        return
+    day = day or datetime.utcnow().date()
+    stmt = insert(SellerDailyRollup).values([
+        {
+            "seller_id": commission["seller_id"],
+            "day": day,
+            "gross": commission["amount"],
+            "commission": commission["commission_amount"],
+            "net": commission["seller_amount"],
+            "order_count": 1
+        }
+        for commission in commissions_data
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SellerDailyRollup.seller_id, SellerDailyRollup.day],
+        set_={
+            "gross": SellerDailyRollup.gross + stmt.excluded.gross,
+            "commission": SellerDailyRollup.commission + stmt.excluded.commission,
+            "net": SellerDailyRollup.net + stmt.excluded.net,
+            "order_count": SellerDailyRollup.order_count + stmt.excluded.order_count
+        }
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_rollups(conn):
+    """Пересчитать дневные итоги из журнала комиссий"""
+    await conn.execute(text("DELETE FROM seller_daily_rollups"))
+    await conn.execute(text(
+        "INSERT INTO seller_daily_rollups (seller_id, day, gross, commission, net, order_count) "
+        "SELECT seller_id, date(created_at), sum(amount), sum(commission_amount), "
+        "sum(seller_amount), count(DISTINCT order_id) "
+        "FROM commissions GROUP BY seller_id, date(created_at)"
+    ))
+
+
+if __name__ == "__main__":
+    # Восстановление итогов из журнала комиссий: python rollups.py
+    import asyncio
+    from database import engine
+
+    async def main():
+        async with engine.begin() as conn:
+            await rebuild_rollups(conn)
+        await engine.dispose()
+
+    asyncio.run(main())
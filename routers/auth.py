@@ -5,13 +5,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from database import get_db
+from group_commit import run_write
 from models import User
 from schemas import UserCreate, UserResponse, Token
 from auth import (
-    verify_password,
-    get_password_hash,
+    hash_password,
+    check_password,
     create_access_token,
     get_current_active_user,
+    invalidate_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -37,17 +39,21 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         )
     
     # Создание нового пользователя
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        username=user_data.username,
-        hashed_password=hashed_password,
-        is_seller=False
-    )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
-    return new_user
+    hashed_password = await hash_password(user_data.password)
+    
+    async def create_user(session: AsyncSession) -> int:
+        new_user = User(
+            email=user_data.email,
+            username=user_data.username,
+            hashed_password=hashed_password,
+            is_seller=False
+        )
+        session.add(new_user)
+        await session.flush()
+        return new_user.id
+    
+    user_id = await run_write(db, create_user)
+    return await db.get(User, user_id, populate_existing=True)
 
 
 @router.post("/login", response_model=Token)
@@ -59,7 +65,11 @@ async def login(
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await check_password(form_data.password, user.hashed_password)
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -69,9 +79,14 @@ async def login(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
+    # Параметры хеширования изменились - сохраняем пересчитанный хеш
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -87,6 +102,7 @@ async def become_seller(current_user: User = Depends(get_current_active_user), d
     """Стать продавцом"""
     current_user.is_seller = True
     await db.commit()
+    invalidate_user(current_user.id)
     await db.refresh(current_user)
     return current_user
 
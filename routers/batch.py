@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+import posixpath
+from typing import List, Tuple
+from urllib.parse import unquote
+
+import orjson
+from fastapi import APIRouter, Request, Response, status
+
+from auth import share_principals
+from database import share_read_session
+from schemas import BatchRequest, BatchResponse, BatchSubRequest
+
+router = APIRouter(prefix="/api", tags=["batch"])
+
+# Маршруты, которые нельзя вызывать из пакета: сам пакет, бесконечный поток событий
+# и выгрузки (пакет собирает ответ в памяти, а выгрузка рассчитана на поток)
+BATCH_EXCLUDED_PATHS = {
+    "/api/batch",
+    "/api/products/events",
+    "/api/orders/export",
+    "/api/commissions/export",
+}
+
+# Заголовки внешнего запроса, которые не передаются подзапросам
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"if-none-match", b"transfer-encoding"}
+
+SubResult = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+class StreamingNotAllowed(Exception):
+    """Подзапрос начал отдавать тело частями"""
+
+
+def _normalize_path(path: str) -> str:
+    """Путь подзапроса так, как его увидит маршрутизатор: %2F раскодирован, . и .. свернуты"""
+    path = posixpath.normpath(unquote(path))
+    # normpath оставляет // в начале пути
+    return "/" + path.lstrip("/")
+
+
+async def _dispatch(request: Request, sub: BatchSubRequest) -> SubResult:
+    """Выполнить подзапрос через приложение целиком (middleware, зависимости, обработчики ошибок)"""
+    raw_path, _, query_string = sub.path.partition("?")
+    path = _normalize_path(raw_path)
+    if path in BATCH_EXCLUDED_PATHS or not path.startswith("/api/"):
+        return _error_result(status.HTTP_400_BAD_REQUEST, "Route is not allowed in a batch")
+
+    headers = [(name, value) for name, value in request.scope["headers"] if name not in _DROPPED_HEADERS]
+    body = b""
+    if sub.body is not None:
+        body = orjson.dumps(sub.body)
+        headers.append((b"content-type", b"application/json"))
+    headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope["asgi"],
+        "http_version": request.scope["http_version"],
+        "method": sub.method,
+        "scheme": request.scope["scheme"],
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": raw_path.encode(),
+        "query_string": query_string.encode(),
+        "headers": headers,
+    }
+
+    body_sent = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Потоковый ответ слушает отключение клиента; подзапрос не отключается
+        await never.wait()
+
+    response_status = None
+    response_headers: List[Tuple[bytes, bytes]] = []
+    chunks = []
+
+    async def send(message):
+        nonlocal response_status, response_headers
+        if message["type"] == "http.response.start":
+            response_status = message["status"]
+            response_headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            if message.get("more_body", False):
+                # Потоковый ответ (в том числе не попавший в BATCH_EXCLUDED_PATHS)
+                # собирался бы в памяти целиком или не закончился бы вовсе
+                raise StreamingNotAllowed()
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except StreamingNotAllowed:
+        return _error_result(status.HTTP_400_BAD_REQUEST, "Streaming responses are not allowed in a batch")
+    except Exception:
+        # ServerErrorMiddleware уже отправил 500 и пробрасывает исключение дальше
+        if response_status is None:
+            return _error_result(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error")
+    return response_status, response_headers, b"".join(chunks)
+
+
+def _error_result(status_code: int, detail: str) -> SubResult:
+    return status_code, [(b"content-type", b"application/json")], orjson.dumps({"detail": detail})
+
+
+def _encode_result(result: SubResult) -> bytes:
+    """Ответ подзапроса как JSON-объект; JSON-тело вставляется как есть, без повторного разбора"""
+    status_code, raw_headers, body = result
+    headers = {}
+    content_type = ""
+    for name, value in raw_headers:
+        name = name.decode("latin-1").lower()
+        if name in ("content-length", "x-db-queries", "x-db-time"):
+            continue
+        headers[name] = value.decode("latin-1")
+        if name == "content-type":
+            content_type = headers[name]
+    if not body:
+        encoded_body = b"null"
+    elif content_type.startswith("application/json"):
+        encoded_body = body
+    else:
+        encoded_body = orjson.dumps(body.decode("utf-8", errors="replace"))
+    return b'{"status":%d,"headers":%s,"body":%s}' % (status_code, orjson.dumps(headers), encoded_body)
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(batch_request: BatchRequest, request: Request):
+    """Выполнить несколько запросов к API за один запрос.
+
+    Подзапросы наследуют заголовки пакета (в том числе Authorization) и
+    выполняются в порядке пакета. Изменяющие подзапросы идут по одному;
+    идущие подряд GET - одновременно, на общей сессии чтения и с одной
+    проверкой токена, поэтому они видят записи перед ними и согласованный
+    снимок базы. Запись может изменить права пользователя, и после нее токен
+    проверяется заново. Ответы идут в порядке подзапросов; ошибка подзапроса
+    не прерывает пакет.
+    """
+    results = []
+    for is_read, group in itertools.groupby(batch_request.requests, key=lambda sub: sub.method == "GET"):
+        if not is_read:
+            for sub in group:
+                results.append(await _dispatch(request, sub))
+            continue
+        with share_principals():
+            async with share_read_session():
+                results += await asyncio.gather(*(_dispatch(request, sub) for sub in group))
+
+    content = b'{"responses":[' + b",".join(_encode_result(result) for result in results) + b"]}"
+    return Response(content=content, media_type="application/json")
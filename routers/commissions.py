@@ -1,38 +1,124 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 
-from database import get_db
-from models import User, Commission
-from schemas import CommissionResponse
-from auth import get_current_seller
+from database import get_read_db
+from models import Commission, SellerDailyRollup
+from schemas import CommissionResponse, CommissionSummary, EarningsBucket
+from auth import Principal, get_current_seller
+from export import date_range_conditions, export_response, stream_partitions
+from serialization import COMMISSION_COLUMNS, commission_adapter, commission_list_adapter, json_response
 
 router = APIRouter(prefix="/api/commissions", tags=["commissions"])
 
 
 @router.get("", response_model=List[CommissionResponse])
 async def get_commissions(
-    current_user: User = Depends(get_current_seller),
-    db: AsyncSession = Depends(get_db)
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получить список комиссий текущего продавца"""
-    result = await db.execute(
-        select(Commission).where(Commission.seller_id == current_user.id)
+    """Получить список комиссий текущего продавца (от новых к старым)"""
+    query = select(*COMMISSION_COLUMNS).where(Commission.seller_id == current_user.id)
+    if before_id is not None:
+        query = query.where(Commission.id < before_id)
+    result = await db.execute(query.order_by(Commission.id.desc()).limit(limit))
+    return json_response(commission_list_adapter, [row._asdict() for row in result.all()])
+
+
+@router.get("/summary", response_model=CommissionSummary)
+async def get_commissions_summary(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Literal["day", "month"] = "day",
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Итоги продаж продавца по дням или месяцам (из дневных итогов, без чтения журнала)"""
+    if granularity == "month":
+        period = func.strftime("%Y-%m", SellerDailyRollup.day)
+    else:
+        period = func.strftime("%Y-%m-%d", SellerDailyRollup.day)
+    
+    query = (
+        select(
+            period.label("period"),
+            func.sum(SellerDailyRollup.gross).label("gross"),
+            func.sum(SellerDailyRollup.commission).label("commission"),
+            func.sum(SellerDailyRollup.net).label("net"),
+            func.sum(SellerDailyRollup.order_count).label("order_count")
+        )
+        .where(SellerDailyRollup.seller_id == current_user.id)
+        .group_by(period)
+        .order_by(period)
+    )
+    if date_from is not None:
+        query = query.where(SellerDailyRollup.day >= date_from)
+    if date_to is not None:
+        query = query.where(SellerDailyRollup.day <= date_to)
+    
+    result = await db.execute(query)
+    buckets = [EarningsBucket(**row._mapping) for row in result.all()]
+    total = EarningsBucket(
+        period="total",
+        gross=sum(bucket.gross for bucket in buckets),
+        commission=sum(bucket.commission for bucket in buckets),
+        net=sum(bucket.net for bucket in buckets),
+        order_count=sum(bucket.order_count for bucket in buckets)
+    )
+    return CommissionSummary(
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+        buckets=buckets,
+        total=total
+    )
+
+
+COMMISSION_EXPORT_FIELDS = [
+    "id", "order_id", "amount", "commission_rate",
+    "commission_amount", "seller_amount", "created_at"
+]
+
+
+async def _commission_export_records(query):
+    async for partition in stream_partitions(query):
+        yield [dict(row._mapping) for row in partition]
+
+
+@router.get("/export")
+async def export_commissions(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    current_user: Principal = Depends(get_current_seller)
+):
+    """Выгрузить журнал комиссий продавца потоком (для сверки выплат)"""
+    query = (
+        select(*[getattr(Commission, field) for field in COMMISSION_EXPORT_FIELDS])
+        .where(
+            Commission.seller_id == current_user.id,
+            *date_range_conditions(Commission.created_at, date_from, date_to)
+        )
+        .order_by(Commission.created_at, Commission.id)
+    )
+    return export_response(
+        _commission_export_records(query), COMMISSION_EXPORT_FIELDS, export_format, "commissions"
     )
-    commissions = result.scalars().all()
-    return commissions
 
 
 @router.get("/{commission_id}", response_model=CommissionResponse)
 async def get_commission(
     commission_id: int,
-    current_user: User = Depends(get_current_seller),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить комиссию по ID"""
-    result = await db.execute(select(Commission).where(Commission.id == commission_id))
-    commission = result.scalar_one_or_none()
+    result = await db.execute(select(*COMMISSION_COLUMNS).where(Commission.id == commission_id))
+    commission = result.one_or_none()
     
     if not commission:
         raise HTTPException(
@@ -46,5 +132,5 @@ async def get_commission(
             detail="Not enough permissions"
         )
     
-    return commission
+    return json_response(commission_adapter, commission._asdict())
 
@@ -1,68 +1,167 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, insert, case, func
 
-from database import get_db
-from models import User, Product, Order, OrderItem, Commission
-from schemas import OrderCreate, OrderResponse, OrderItemResponse
-from auth import get_current_active_user
+from database import get_db, get_read_db
+from models import Product, Order, OrderItem
+from schemas import OrderCreate, OrderResponse
+from auth import Principal, get_current_active_principal
+from outbox import enqueue, outbox_worker
+from inventory import inventory
+from group_commit import run_write
+from events import product_events
+from export import date_range_conditions, export_response, stream_partitions
+from serialization import ORDER_COLUMNS, json_response, order_adapter, order_list_adapter
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
 # Ставка комиссии (10%)
 COMMISSION_RATE = 0.1
 
+# Название для позиций заказа, товар которых уже удален продавцом
+DELETED_PRODUCT_NAME = "Товар удален"
 
-@router.get("", response_model=List[OrderResponse])
-async def get_orders(
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Получить список заказов текущего пользователя"""
-    result = await db.execute(select(Order).where(Order.buyer_id == current_user.id))
-    orders = result.scalars().all()
+
+async def build_order_responses(db: AsyncSession, orders) -> List[dict]:
+    """Собрать ответы для заказов (объекты Order или строки ORDER_COLUMNS):
+    все позиции и названия товаров одним запросом, результат - словари для order_adapter"""
+    if not orders:
+        return []
     
-    # Загружаем items для каждого заказа
-    orders_with_items = []
-    for order in orders:
-        result = await db.execute(
-            select(OrderItem, Product.name)
-            .join(Product, OrderItem.product_id == Product.id)
-            .where(OrderItem.order_id == order.id)
+    result = await db.execute(
+        select(
+            OrderItem.order_id,
+            OrderItem.id,
+            OrderItem.product_id,
+            func.coalesce(Product.name, DELETED_PRODUCT_NAME).label("product_name"),
+            OrderItem.quantity,
+            OrderItem.price
         )
-        items_data = result.all()
-        order_dict = {
+        .outerjoin(Product, OrderItem.product_id == Product.id)
+        .where(OrderItem.order_id.in_([order.id for order in orders]))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    )
+    items_by_order = {order.id: [] for order in orders}
+    for order_id, item_id, product_id, product_name, quantity, price in result.all():
+        items_by_order[order_id].append({
+            "id": item_id,
+            "product_id": product_id,
+            "product_name": product_name,
+            "quantity": quantity,
+            "price": price
+        })
+    
+    return [
+        {
             "id": order.id,
             "buyer_id": order.buyer_id,
             "total_amount": order.total_amount,
             "status": order.status,
             "created_at": order.created_at,
-            "items": [
-                OrderItemResponse(
-                    id=item.id,
-                    product_id=item.product_id,
-                    product_name=product_name,
-                    quantity=item.quantity,
-                    price=item.price
-                )
-                for item, product_name in items_data
-            ]
+            "items": items_by_order[order.id]
         }
-        orders_with_items.append(OrderResponse(**order_dict))
+        for order in orders
+    ]
+
+
+@router.get("", response_model=List[OrderResponse])
+async def get_orders(
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    order_status: Optional[str] = Query(None, alias="status"),
+    current_user: Principal = Depends(get_current_active_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Получить список заказов текущего пользователя (от новых к старым)"""
+    query = select(*ORDER_COLUMNS).where(Order.buyer_id == current_user.id)
+    if before_id is not None:
+        query = query.where(Order.id < before_id)
+    if order_status is not None:
+        query = query.where(Order.status == order_status)
     
-    return orders_with_items
+    result = await db.execute(query.order_by(Order.id.desc()).limit(limit))
+    orders = result.all()
+    return json_response(order_list_adapter, await build_order_responses(db, orders))
+
+
+ORDER_EXPORT_FIELDS = [
+    "order_id", "created_at", "status", "total_amount",
+    "item_id", "product_id", "product_name", "quantity", "price"
+]
+
+
+async def _order_export_records(query, nested: bool):
+    """Порции записей выгрузки: по позиции на запись или (nested) по заказу с позициями"""
+    current = None
+    async for partition in stream_partitions(query):
+        batch = []
+        for row in partition:
+            if not nested:
+                batch.append(dict(row._mapping))
+                continue
+            if current is None or current["id"] != row.order_id:
+                if current is not None:
+                    batch.append(current)
+                current = {
+                    "id": row.order_id,
+                    "created_at": row.created_at,
+                    "status": row.status,
+                    "total_amount": row.total_amount,
+                    "items": []
+                }
+            if row.item_id is not None:
+                current["items"].append({
+                    "id": row.item_id,
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "quantity": row.quantity,
+                    "price": row.price
+                })
+        yield batch
+    if current is not None:
+        yield [current]
+
+
+@router.get("/export")
+async def export_orders(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """Выгрузить историю заказов потоком (NDJSON - заказ на строку, CSV - позиция на строку)"""
+    query = (
+        select(
+            Order.id.label("order_id"),
+            Order.created_at,
+            Order.status,
+            Order.total_amount,
+            OrderItem.id.label("item_id"),
+            OrderItem.product_id,
+            func.coalesce(Product.name, DELETED_PRODUCT_NAME).label("product_name"),
+            OrderItem.quantity,
+            OrderItem.price
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(Order.buyer_id == current_user.id, *date_range_conditions(Order.created_at, date_from, date_to))
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    records = _order_export_records(query, nested=export_format == "ndjson")
+    return export_response(records, ORDER_EXPORT_FIELDS, export_format, "orders")
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Получить заказ по ID"""
-    result = await db.execute(select(Order).where(Order.id == order_id))
-    order = result.scalar_one_or_none()
+    result = await db.execute(select(*ORDER_COLUMNS).where(Order.id == order_id))
+    order = result.one_or_none()
     
     if not order:
         raise HTTPException(
@@ -76,142 +175,168 @@ async def get_order(
             detail="Not enough permissions"
         )
     
+    responses = await build_order_responses(db, [order])
+    return json_response(order_adapter, responses[0])
+
+
+def enqueue_order_created(db: AsyncSession, order_id: int, seller_totals: dict, items: List[dict]):
+    """Записать в outbox комиссии продавцов (seller_id -> сумма продаж) и позиции заказа.
+
+    Журнал комиссий, итоги, продажи товаров и новая версия каталога записываются
+    воркером outbox после ответа; событие фиксируется в транзакции заказа.
+    """
+    commissions_data = []
+    for seller_id, amount in seller_totals.items():
+        commission_amount = amount * COMMISSION_RATE
+        commissions_data.append({
+            "order_id": order_id,
+            "seller_id": seller_id,
+            "amount": amount,
+            "commission_rate": COMMISSION_RATE,
+            "commission_amount": commission_amount,
+            "seller_amount": amount - commission_amount
+        })
+    enqueue(db, "order_created", {
+        "order_id": order_id,
+        "created_at": datetime.utcnow().isoformat(sep=" "),
+        "commissions": commissions_data,
+        "items": [
+            {"product_id": item["product_id"], "quantity": item["quantity"], "price": item["price"]}
+            for item in items
+        ]
+    })
+
+
+async def _place_order(
+    db: AsyncSession,
+    buyer_id: int,
+    requested: dict,
+    products: dict,
+    total_amount: float
+) -> Tuple[int, dict]:
+    """Списать остатки и записать заказ с позициями (единица записи для run_write).
+
+    Возвращает id заказа и новые остатки товаров {product_id: quantity}.
+    """
+    # Списываем остатки одним условным UPDATE: строка обновляется, только если
+    # товара хватает, поэтому параллельный заказ не может уйти в минус
+    needed = case(requested, value=Product.id)
     result = await db.execute(
-        select(OrderItem, Product.name)
-        .join(Product, OrderItem.product_id == Product.id)
-        .where(OrderItem.order_id == order.id)
+        update(Product)
+        .where(Product.id.in_(requested), Product.quantity >= needed)
+        .values(quantity=Product.quantity - needed)
+        .returning(Product.id, Product.quantity)
+        .execution_options(synchronize_session=False)
     )
-    items_data = result.all()
+    remaining = {row.id: row.quantity for row in result}
+    if len(remaining) != len(requested):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Not enough quantity for one or more products"
+        )
     
-    order_dict = {
-        "id": order.id,
-        "buyer_id": order.buyer_id,
-        "total_amount": order.total_amount,
-        "status": order.status,
-        "created_at": order.created_at,
-        "items": [
-            OrderItemResponse(
-                id=item.id,
-                product_id=item.product_id,
-                product_name=product_name,
-                quantity=item.quantity,
-                price=item.price
-            )
-            for item, product_name in items_data
-        ]
-    }
+    # Создаем заказ
+    new_order = Order(
+        buyer_id=buyer_id,
+        total_amount=total_amount,
+        status="pending"
+    )
+    db.add(new_order)
+    await db.flush()  # Получаем ID заказа
     
-    return OrderResponse(**order_dict)
+    # Создаем элементы заказа пакетной вставкой
+    items_data = [
+        {
+            "order_id": new_order.id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "price": products[product_id].price
+        }
+        for product_id, quantity in requested.items()
+    ]
+    await db.execute(insert(OrderItem), items_data)
+    
+    seller_totals = {}  # seller_id -> total_amount
+    for product_id, quantity in requested.items():
+        product = products[product_id]
+        seller_totals[product.seller_id] = seller_totals.get(product.seller_id, 0.0) + product.price * quantity
+    enqueue_order_created(db, new_order.id, seller_totals, items_data)
+    return new_order.id, remaining
 
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Создать новый заказ"""
-    total_amount = 0.0
-    order_items_data = []
-    
-    # Проверяем товары и рассчитываем сумму
+    # Объединяем повторяющиеся позиции: product_id -> общее количество
+    requested = {}
     for item_data in order_data.items:
-        result = await db.execute(select(Product).where(Product.id == item_data.product_id))
-        product = result.scalar_one_or_none()
-        
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product {item_data.product_id} not found"
-            )
-        
-        if product.quantity < item_data.quantity:
+        requested[item_data.product_id] = requested.get(item_data.product_id, 0) + item_data.quantity
+    
+    # Горячие товары сначала списываются со счетчиков inventory.py. Накопленные
+    # резервы и отмены записываются заранее, чтобы остаток в базе совпал со счетчиком.
+    # Это делается до первого запроса сессии: сброс берет соединение из того же пула,
+    # и заказы, ждущие его со своими соединениями, при наплыве исчерпали бы пул
+    hot = {product_id: quantity for product_id, quantity in requested.items() if inventory.is_hot(product_id)}
+    if hot:
+        await inventory.flush()
+        if not inventory.take(hot):
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Not enough quantity for product {product.name}. Available: {product.quantity}"
+                detail="Not enough quantity for one or more products"
             )
-        
-        item_total = product.price * item_data.quantity
-        total_amount += item_total
-        order_items_data.append((product, item_data.quantity, product.price))
-    
-    # Создаем заказ
-    new_order = Order(
-        buyer_id=current_user.id,
-        total_amount=total_amount,
-        status="pending"
-    )
-    db.add(new_order)
-    await db.flush()  # Получаем ID заказа
-    
-    # Создаем элементы заказа и обновляем количество товаров
-    for product, quantity, price in order_items_data:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=product.id,
-            quantity=quantity,
-            price=price
+    try:
+        # Загружаем все товары заказа одним запросом
+        result = await db.execute(
+            select(Product.id, Product.name, Product.price, Product.quantity, Product.seller_id)
+            .where(Product.id.in_(requested))
         )
-        db.add(order_item)
-        product.quantity -= quantity
-    
-    # Создаем комиссию для каждого продавца
-    seller_totals = {}  # seller_id -> total_amount
-    for product, quantity, price in order_items_data:
-        if product.seller_id not in seller_totals:
-            seller_totals[product.seller_id] = 0.0
-        seller_totals[product.seller_id] += price * quantity
-    
-    for seller_id, amount in seller_totals.items():
-        commission_amount = amount * COMMISSION_RATE
-        seller_amount = amount - commission_amount
+        products = {row.id: row for row in result.all()}
+        
+        # Проверяем товары и рассчитываем сумму
+        total_amount = 0.0
+        for product_id, quantity in requested.items():
+            product = products.get(product_id)
+            
+            if not product:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Product {product_id} not found"
+                )
+            
+            # Остаток горячего товара уже проверен счетчиком inventory.py
+            if product.quantity < quantity and product_id not in hot:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Not enough quantity for product {product.name}. Available: {product.quantity}"
+                )
+            
+            total_amount += product.price * quantity
         
-        commission = Commission(
-            order_id=new_order.id,
-            seller_id=seller_id,
-            amount=amount,
-            commission_rate=COMMISSION_RATE,
-            commission_amount=commission_amount,
-            seller_amount=seller_amount
+        order_id, remaining = await run_write(
+            db, lambda session: _place_order(session, current_user.id, requested, products, total_amount)
         )
-        db.add(commission)
-    
-    await db.commit()
-    await db.refresh(new_order)
+    except BaseException:
+        inventory.give_back(hot)
+        raise
     
-    # Формируем ответ с items
-    result = await db.execute(
-        select(OrderItem, Product.name)
-        .join(Product, OrderItem.product_id == Product.id)
-        .where(OrderItem.order_id == new_order.id)
-    )
-    items_data = result.all()
+    outbox_worker.notify()
+    product_events.publish([
+        {"id": product_id, "quantity": quantity} for product_id, quantity in remaining.items()
+    ])
+    new_order = await db.get(Order, order_id, populate_existing=True)
     
-    order_dict = {
-        "id": new_order.id,
-        "buyer_id": new_order.buyer_id,
-        "total_amount": new_order.total_amount,
-        "status": new_order.status,
-        "created_at": new_order.created_at,
-        "items": [
-            OrderItemResponse(
-                id=item.id,
-                product_id=item.product_id,
-                product_name=product_name,
-                quantity=item.quantity,
-                price=item.price
-            )
-            for item, product_name in items_data
-        ]
-    }
-    
-    return OrderResponse(**order_dict)
+    responses = await build_order_responses(db, [new_order])
+    return json_response(order_adapter, responses[0], status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/{order_id}/complete", response_model=OrderResponse)
 async def complete_order(
     order_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Завершить заказ"""
@@ -230,35 +355,12 @@ async def complete_order(
             detail="Not enough permissions"
         )
     
-    order.status = "completed"
-    await db.commit()
-    await db.refresh(order)
+    async def mark_completed(session: AsyncSession):
+        await session.execute(update(Order).where(Order.id == order_id).values(status="completed"))
     
-    # Загружаем items
-    result = await db.execute(
-        select(OrderItem, Product.name)
-        .join(Product, OrderItem.product_id == Product.id)
-        .where(OrderItem.order_id == order.id)
-    )
-    items_data = result.all()
-    
-    order_dict = {
-        "id": order.id,
-        "buyer_id": order.buyer_id,
-        "total_amount": order.total_amount,
-        "status": order.status,
-        "created_at": order.created_at,
-        "items": [
-            OrderItemResponse(
-                id=item.id,
-                product_id=item.product_id,
-                product_name=product_name,
-                quantity=item.quantity,
-                price=item.price
-            )
-            for item, product_name in items_data
-        ]
-    }
+    await run_write(db, mark_completed)
+    await db.refresh(order)
     
-    return OrderResponse(**order_dict)
+    responses = await build_order_responses(db, [order])
+    return json_response(order_adapter, responses[0])
 
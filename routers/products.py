@@ -1,63 +1,554 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import String, case, delete, literal_column, select, func, type_coerce, update
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import UnaryExpression
 
-from database import get_db
-from models import User, Product
-from schemas import ProductCreate, ProductUpdate, ProductResponse
-from auth import get_current_active_user, get_current_seller
+from database import get_db, get_read_db
+from models import Product, ProductSalesStats
+from schemas import (
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+    ProductPage,
+    ProductSearchResult,
+    TopProduct,
+    BulkImportResult,
+    BulkRowError,
+    ProductBulkUpdateItem,
+    ProductBulkUpdateItemResult,
+    ProductBulkUpdateResult
+)
+from pagination import apply_keyset, make_page
+from auth import Principal, get_current_seller
+from search import build_match_query, search_query, index_product, index_products, mark_matches, unindex_product
+from catalog_cache import bump_catalog_version, cached_json_response
+from inventory import close_reservations, inventory
+from group_commit import run_write
+from events import product_events
+from popularity import RANKING_COLUMNS, add_products, remove_product
+from serialization import (
+    PRODUCT_COLUMNS,
+    json_response,
+    product_adapter,
+    product_page_adapter,
+    top_product_list_adapter
+)
+from bulk_import import MAX_REPORTED_ERRORS, ParsedRow, iter_chunks, iter_csv_rows, iter_lines, iter_ndjson_rows
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
+# Максимум позиций в одном PATCH /bulk (ограничивает число параметров в CASE)
+BULK_UPDATE_LIMIT = 1000
 
-@router.get("", response_model=List[ProductResponse])
+
+# created_at в курсоре - строка в том виде, в каком она хранится в базе: CURRENT_TIMESTAMP
+# пишет ее без микросекунд, а привязка datetime добавила бы их, и сравнение строк
+# на равных секундах повторяло бы или пропускало товары
+_CREATED_AT_KEY = type_coerce(Product.created_at, String).label("created_at_key")
+
+
+def _unindexed(column):
+    """column под унарным +: значение то же, но SQLite не ищет по такому условию в индексе"""
+    return UnaryExpression(column, operator=operators.custom_op("+"), type_=column.type)
+
+
+# Допустимые сортировки каталога: имя -> (колонка, по убыванию).
+# Все варианты дополняются id; страница читается обходом индекса сортировки из
+# models.Product (с префиксом seller_id, если задан продавец) до LIMIT, popular -
+# индексом (seller_id?, score_7d, product_id) таблицы продаж. Планы проверяет
+# tests/test_catalog_query_plans.py.
+PRODUCT_SORTS = {
+    "id": (None, False),
+    "newest": (_CREATED_AT_KEY, True),
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+    "name": (Product.name, False),
+    "popular": (ProductSalesStats.score_7d, True),
+}
+
+
+@router.get("", response_model=ProductPage)
 async def get_products(
-    skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    seller_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    sort: Literal["id", "newest", "price_asc", "price_desc", "name", "popular"] = "id",
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Получить страницу каталога товаров с фильтрами и сортировкой (курсорная пагинация)"""
+    async def build() -> bytes:
+        page = await _load_products_page(
+            db, cursor, limit, min_price, max_price, in_stock, seller_id, created_after, sort
+        )
+        return product_page_adapter.dump_json(page)
+    
+    return await cached_json_response(request, db, build)
+
+
+async def _load_products_page(
+    db: AsyncSession,
+    cursor: Optional[str],
+    limit: int,
+    min_price: Optional[float],
+    max_price: Optional[float],
+    in_stock: bool,
+    seller_id: Optional[int],
+    created_after: Optional[datetime],
+    sort: str
+) -> dict:
+    query = products_page_query(cursor, min_price, max_price, in_stock, seller_id, created_after, sort)
+    # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+    result = await db.execute(query.limit(limit + 1))
+    sort_column = PRODUCT_SORTS[sort][0]
+    sort_key = (lambda product: getattr(product, sort_column.key)) if sort_column is not None else None
+    return _page_of_rows(make_page(result.all(), limit, sort_key))
+
+
+def products_page_query(
+    cursor: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    in_stock: bool,
+    seller_id: Optional[int],
+    created_after: Optional[datetime],
+    sort: str
+):
+    """SELECT страницы каталога с фильтрами, сортировкой и позицией курсора (без LIMIT)"""
+    sort_column, descending = PRODUCT_SORTS[sort]
+    # Фильтр, которого нет в индексе сортировки, записан через унарный +: иначе
+    # SQLite может выбрать узкий на вид диапазон по нему и сортировать всю выборку
+    # во временном B-дереве. Такие фильтры проверяются на ходу при обходе индекса;
+    # цена при сортировке по цене и дата при newest остаются границами обхода
+    price = Product.price if sort in ("price_asc", "price_desc") else _unindexed(Product.price)
+    created_at = Product.created_at if sort == "newest" else _unindexed(Product.created_at)
+    # Частичный индекс товаров с остатком упорядочен по id и подходит только сортировке id
+    quantity = Product.quantity if sort == "id" and seller_id is None else _unindexed(Product.quantity)
+    
+    query = select(*PRODUCT_COLUMNS)
+    if min_price is not None:
+        query = query.where(price >= min_price)
+    if max_price is not None:
+        query = query.where(price <= max_price)
+    if in_stock:
+        # Литерал, а не параметр: иначе SQLite не может взять частичный индекс по quantity > 0
+        query = query.where(quantity > literal_column("0"))
+    if created_after is not None:
+        # created_at хранится в UTC без часового пояса
+        if created_after.tzinfo is not None:
+            created_after = created_after.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.where(created_at >= created_after)
+    
+    id_column = Product.id
+    seller_column = Product.seller_id
+    if sort == "popular":
+        # Рейтинг читается по индексу таблицы продаж, товары - по первичному ключу
+        query = query.join(ProductSalesStats, ProductSalesStats.product_id == Product.id)
+        id_column = ProductSalesStats.product_id
+        seller_column = ProductSalesStats.seller_id
+    if seller_id is not None:
+        query = query.where(seller_column == seller_id)
+    if sort_column is not None and sort_column not in PRODUCT_COLUMNS:
+        # Ключ сортировки нужен в строке для курсора
+        query = query.add_columns(sort_column)
+    return apply_keyset(query, id_column, sort_column, descending, cursor)
+
+
+def _page_of_rows(page: dict) -> dict:
+    """Страница из строк select(*PRODUCT_COLUMNS) -> словари для product_page_adapter"""
+    page["items"] = [row._asdict() for row in page["items"]]
+    return page
+
+
+@router.get("/mine", response_model=ProductPage)
+async def get_my_products(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    low_stock: Optional[int] = Query(None, ge=0),
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получить список всех товаров"""
-    result = await db.execute(select(Product).offset(skip).limit(limit))
-    products = result.scalars().all()
-    return products
+    """Получить товары текущего продавца (low_stock - только с остатком не больше заданного)"""
+    query = select(*PRODUCT_COLUMNS).where(Product.seller_id == current_user.id)
+    if low_stock is not None:
+        query = query.where(Product.quantity <= low_stock)
+    query = apply_keyset(query, Product.id, cursor=cursor)
+    
+    result = await db.execute(query.limit(limit + 1))
+    return json_response(product_page_adapter, _page_of_rows(make_page(result.all(), limit)))
+
+
+@router.get("/search", response_model=List[ProductSearchResult])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Полнотекстовый поиск товаров по названию и описанию (ранжирование BM25)"""
+    match = build_match_query(q)
+    if match is None:
+        return []
+    
+    query = search_query(match)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    if in_stock:
+        query = query.where(Product.quantity > 0)
+    
+    result = await db.execute(query.limit(limit))
+    return [
+        ProductSearchResult(
+            **ProductResponse.model_validate(product).model_dump(),
+            name_highlight=mark_matches(name_highlight),
+            snippet=mark_matches(snippet) if snippet else None,
+            rank=rank
+        )
+        for product, name_highlight, snippet, rank in result.all()
+    ]
+
+
+@router.get("/top", response_model=List[TopProduct])
+async def get_top_products(
+    request: Request,
+    window: Literal["7d", "30d", "all"] = "7d",
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Самые продаваемые товары: 7d и 30d - по очкам с затуханием, all - по всем проданным штукам"""
+    score = RANKING_COLUMNS[window]
+
+    async def build() -> bytes:
+        result = await db.execute(
+            select(
+                *PRODUCT_COLUMNS,
+                ProductSalesStats.units_sold,
+                ProductSalesStats.revenue,
+                score.label("score")
+            )
+            .join(ProductSalesStats, ProductSalesStats.product_id == Product.id)
+            .where(score > 0)
+            .order_by(score.desc(), ProductSalesStats.product_id.desc())
+            .limit(limit)
+        )
+        return top_product_list_adapter.dump_json([row._asdict() for row in result.all()])
+
+    return await cached_json_response(request, db, build)
+
+
+@router.get("/events")
+async def product_events_stream(last_event_id: Optional[str] = Header(None)):
+    """Поток SSE изменений остатков и цен: data - список [{"id", "price"?, "quantity"?, "deleted"?}].
+
+    Событие resync означает, что изменения потеряны (клиент не успевал
+    читать или переподключился слишком поздно) и каталог нужно перечитать.
+    """
+    return StreamingResponse(
+        product_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Получить товар по ID"""
-    result = await db.execute(select(Product).where(Product.id == product_id))
-    product = result.scalar_one_or_none()
-    if not product:
+    async def build() -> bytes:
+        result = await db.execute(select(*PRODUCT_COLUMNS).where(Product.id == product_id))
+        product = result.one_or_none()
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return product_adapter.dump_json(product._asdict())
+    
+    return await cached_json_response(request, db, build)
+
+
+def _is_sku_conflict(exc: IntegrityError) -> bool:
+    # SQLite называет колонки уникального индекса, PostgreSQL - сам индекс
+    message = str(exc.orig)
+    return "ux_products_seller_id_sku" in message or "products.seller_id, products.sku" in message
+
+
+async def _flush_or_sku_conflict(db: AsyncSession):
+    try:
+        await db.flush()
+    except IntegrityError as exc:
+        if not _is_sku_conflict(exc):
+            raise
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SKU already exists"
         )
-    return product
+
+
+def _add_import_error(report: BulkImportResult, row: int, error: str):
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(BulkRowError(row=row, error=error))
+    else:
+        report.errors_truncated = True
+
+
+async def _import_chunk(
+    db: AsyncSession,
+    chunk: List[ParsedRow],
+    seller_id: int,
+    upsert: bool,
+    report: BulkImportResult
+):
+    """Проверить порцию строк и вставить корректные одним executemany в одной транзакции"""
+    valid = []
+    for row_number, data in chunk:
+        if isinstance(data, str):
+            _add_import_error(report, row_number, data)
+            continue
+        try:
+            product = ProductCreate.model_validate(data)
+        except ValidationError as exc:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )
+            _add_import_error(report, row_number, message)
+            continue
+        valid.append((row_number, {**product.model_dump(), "seller_id": seller_id}))
+    
+    # Без upsert повтор артикула - ошибка строки: проверяем все артикулы порции одним запросом
+    if not upsert:
+        skus = [data["sku"] for _, data in valid if data["sku"] is not None]
+        existing = set()
+        if skus:
+            result = await db.execute(
+                select(Product.sku).where(Product.seller_id == seller_id, Product.sku.in_(skus))
+            )
+            existing = set(result.scalars().all())
+        unique_rows = []
+        for row_number, data in valid:
+            if data["sku"] is not None:
+                if data["sku"] in existing:
+                    _add_import_error(report, row_number, f"SKU {data['sku']} already exists")
+                    continue
+                existing.add(data["sku"])
+            unique_rows.append((row_number, data))
+        valid = unique_rows
+    
+    if not valid:
+        return
+    
+    table = Product.__table__
+    stmt = sqlite_insert(table)
+    if upsert:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.seller_id, table.c.sku],
+            set_={
+                "name": stmt.excluded.name,
+                "description": stmt.excluded.description,
+                "price": stmt.excluded.price,
+                "quantity": stmt.excluded.quantity,
+                "updated_at": func.now()
+            }
+        )
+    stmt = stmt.returning(table.c.id, table.c.name, table.c.description, sort_by_parameter_order=True)
+    result = await db.execute(stmt, [data for _, data in valid])
+    rows = result.all()
+    
+    await index_products(db, rows)
+    await add_products(db, seller_id, [row.id for row in rows])
+    await bump_catalog_version(db)
+    await db.commit()
+    report.imported += len(rows)
+    
+    # upsert мог изменить остаток горячих товаров - перечитываем их счетчики
+    hot_ids = [row.id for row in rows if inventory.is_hot(row.id)]
+    if hot_ids:
+        await inventory.reload(hot_ids)
+
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_products(
+    request: Request,
+    import_format: Optional[Literal["csv", "ndjson"]] = Query(None, alias="format"),
+    upsert: bool = False,
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_db)
+):
+    """Массовая загрузка товаров из CSV или NDJSON в теле запроса (upsert=true - обновить по sku)"""
+    if import_format is None:
+        import_format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    
+    lines = iter_lines(request.stream())
+    rows = iter_csv_rows(lines) if import_format == "csv" else iter_ndjson_rows(lines)
+    
+    report = BulkImportResult()
+    async for chunk in iter_chunks(rows):
+        await _import_chunk(db, chunk, current_user.id, upsert, report)
+    report.errors.sort(key=lambda error: error.row)
+    return report
+
+
+def _bulk_update_failure(item: ProductBulkUpdateItem, item_status: str, error: str) -> ProductBulkUpdateItemResult:
+    return ProductBulkUpdateItemResult(id=item.id, status=item_status, error=error)
+
+
+async def _update_field(db: AsyncSession, seller_id: int, values: dict, column, delta: bool = False) -> dict:
+    """Один UPDATE ... CASE id для всех товаров с изменением поля; вернуть {id: (price, quantity)}"""
+    if not values:
+        return {}
+    new_value = case(values, value=Product.id)
+    query = update(Product).where(Product.id.in_(values), Product.seller_id == seller_id)
+    if delta:
+        # Условие в том же UPDATE: параллельный заказ не даст увести остаток в минус
+        query = query.where(Product.quantity + new_value >= 0).values(quantity=Product.quantity + new_value)
+    else:
+        query = query.values({column: new_value})
+    result = await db.execute(
+        query.returning(Product.id, Product.price, Product.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.id: (row.price, row.quantity) for row in result}
+
+
+@router.patch("/bulk", response_model=ProductBulkUpdateResult)
+async def bulk_update_products(
+    items: List[ProductBulkUpdateItem] = Body(..., min_length=1, max_length=BULK_UPDATE_LIMIT),
+    atomic: bool = False,
+    current_user: Principal = Depends(get_current_seller),
+    db: AsyncSession = Depends(get_db)
+):
+    """Массово изменить цены и остатки своих товаров (atomic=true - все или ничего)"""
+    results = {}
+    seen = set()
+    for index, item in enumerate(items):
+        if item.id in seen:
+            results[index] = _bulk_update_failure(item, "invalid", "Duplicate product id")
+        elif item.quantity is not None and item.quantity_delta is not None:
+            results[index] = _bulk_update_failure(item, "invalid", "quantity and quantity_delta are mutually exclusive")
+        elif item.price is None and item.quantity is None and not item.quantity_delta:
+            results[index] = _bulk_update_failure(item, "invalid", "Nothing to update")
+        else:
+            results[index] = None
+        seen.add(item.id)
+    
+    # Владельцы и текущие остатки всех товаров - одним запросом
+    ids = [items[index].id for index, result in results.items() if result is None]
+    rows = await db.execute(select(Product.id, Product.seller_id, Product.quantity).where(Product.id.in_(ids)))
+    products = {row.id: row for row in rows}
+    
+    prices, quantities, deltas = {}, {}, {}
+    for index, result in results.items():
+        if result is not None:
+            continue
+        item = items[index]
+        product = products.get(item.id)
+        if product is None:
+            results[index] = _bulk_update_failure(item, "not_found", "Product not found")
+        elif product.seller_id != current_user.id:
+            results[index] = _bulk_update_failure(item, "forbidden", "Not enough permissions")
+        elif item.quantity_delta and product.quantity + item.quantity_delta < 0:
+            results[index] = _bulk_update_failure(item, "insufficient_stock", "Not enough quantity")
+        else:
+            if item.price is not None:
+                prices[item.id] = item.price
+            if item.quantity is not None:
+                quantities[item.id] = item.quantity
+            if item.quantity_delta:
+                deltas[item.id] = item.quantity_delta
+    
+    failed = sum(result is not None for result in results.values())
+    applied = not (atomic and failed)
+    if applied:
+        # Сначала изменения остатка: товар, которому не хватило остатка, не получает и новую цену
+        updated = await _update_field(db, current_user.id, deltas, Product.quantity, delta=True)
+        changed_stock = set(updated)
+        prices = {product_id: price for product_id, price in prices.items()
+                  if product_id not in deltas or product_id in changed_stock}
+        updated.update(await _update_field(db, current_user.id, prices, Product.price))
+        updated.update(await _update_field(db, current_user.id, quantities, Product.quantity))
+        
+        for index, result in results.items():
+            item = items[index]
+            if result is not None:
+                continue
+            if item.id in deltas and item.id not in changed_stock:
+                # Остаток успели списать между проверкой и UPDATE
+                results[index] = _bulk_update_failure(item, "insufficient_stock", "Not enough quantity")
+                failed += 1
+            else:
+                price, quantity = updated[item.id]
+                results[index] = ProductBulkUpdateItemResult(
+                    id=item.id, status="updated", price=price, quantity=quantity
+                )
+        applied = not (atomic and failed)
+    
+    if applied and len(results) > failed:
+        await bump_catalog_version(db)
+        await db.commit()
+        product_events.publish([
+            {"id": product_id, "price": price, "quantity": quantity}
+            for product_id, (price, quantity) in updated.items()
+        ])
+        hot_ids = [product_id for product_id in updated if inventory.is_hot(product_id)]
+        if hot_ids:
+            await inventory.reload(hot_ids)
+    else:
+        await db.rollback()
+        for index, result in results.items():
+            if result is None or result.status == "updated":
+                results[index] = _bulk_update_failure(items[index], "skipped", "Rolled back: other items failed")
+    
+    return ProductBulkUpdateResult(
+        applied=applied,
+        updated=len(results) - failed if applied else 0,
+        failed=failed,
+        results=[results[index] for index in range(len(items))]
+    )
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
-    current_user: User = Depends(get_current_seller),
+    current_user: Principal = Depends(get_current_seller),
     db: AsyncSession = Depends(get_db)
 ):
     """Создать новый товар (только для продавцов)"""
-    new_product = Product(
-        **product_data.model_dump(),
-        seller_id=current_user.id
-    )
-    db.add(new_product)
-    await db.commit()
-    await db.refresh(new_product)
-    return new_product
+    async def insert_product(session: AsyncSession) -> int:
+        new_product = Product(
+            **product_data.model_dump(),
+            seller_id=current_user.id
+        )
+        session.add(new_product)
+        await _flush_or_sku_conflict(session)
+        await index_product(session, new_product)
+        await add_products(session, new_product.seller_id, [new_product.id])
+        await bump_catalog_version(session)
+        return new_product.id
+    
+    product_id = await run_write(db, insert_product)
+    return await db.get(Product, product_id, populate_existing=True)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    current_user: User = Depends(get_current_seller),
+    current_user: Principal = Depends(get_current_seller),
     db: AsyncSession = Depends(get_db)
 ):
     """Обновить товар (только владелец-продавец)"""
@@ -80,15 +571,24 @@ async def update_product(
     for field, value in update_data.items():
         setattr(product, field, value)
     
+    await _flush_or_sku_conflict(db)
+    if "name" in update_data or "description" in update_data:
+        await index_product(db, product)
+    await bump_catalog_version(db)
     await db.commit()
+    # Счетчик горячего товара перечитывается после изменения остатка или признака
+    if inventory.is_hot(product_id) or update_data.get("is_hot"):
+        await inventory.reload([product_id])
     await db.refresh(product)
+    if "price" in update_data or "quantity" in update_data:
+        product_events.publish([{"id": product.id, "price": product.price, "quantity": product.quantity}])
     return product
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    current_user: User = Depends(get_current_seller),
+    current_user: Principal = Depends(get_current_seller),
     db: AsyncSession = Depends(get_db)
 ):
     """Удалить товар (только владелец-продавец)"""
@@ -107,7 +607,15 @@ async def delete_product(
             detail="Not enough permissions"
         )
     
-    db.delete(product)
+    await unindex_product(db, product.id)
+    await remove_product(db, product.id)
+    await close_reservations(db, product.id)
+    # Удаление без ORM: позиции прошлых заказов сохраняют product_id и
+    # показываются как DELETED_PRODUCT_NAME (см. routers/orders.py)
+    await db.execute(delete(Product).where(Product.id == product.id))
+    await bump_catalog_version(db)
     await db.commit()
+    product_events.publish([{"id": product_id, "deleted": True}])
+    inventory.forget(product_id)
     return None
 
@@ -0,0 +1,133 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert
+
+from database import get_db
+from models import Product, Order, OrderItem, InventoryReservation
+from schemas import ReservationCreate, ReservationResponse, OrderResponse
+from auth import Principal, get_current_active_principal
+from inventory import Reservation, inventory
+from outbox import outbox_worker
+from group_commit import run_write
+from serialization import json_response, order_adapter
+from routers.orders import build_order_responses, enqueue_order_created
+
+router = APIRouter(prefix="/api/reservations", tags=["reservations"])
+
+
+def _get_own_reservation(reservation_id: str, current_user: Principal) -> Reservation:
+    reservation = inventory.reservations.get(reservation_id)
+    if reservation is None or reservation.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reservation not found"
+        )
+    return reservation
+
+
+async def _place_reserved_order(db: AsyncSession, reservation: Reservation, buyer_id: int) -> int:
+    """Отметить резерв оформленным и записать заказ (единица записи для run_write)"""
+    result = await db.execute(
+        update(InventoryReservation)
+        .where(InventoryReservation.id == reservation.id, InventoryReservation.status == "held")
+        .values(status="consumed")
+    )
+    if result.rowcount != 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reservation is no longer available"
+        )
+
+    result = await db.execute(
+        select(Product.price, Product.seller_id).where(Product.id == reservation.product_id)
+    )
+    product = result.one_or_none()
+    if product is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+
+    amount = product.price * reservation.quantity
+    new_order = Order(buyer_id=buyer_id, total_amount=amount, status="pending")
+    db.add(new_order)
+    await db.flush()
+    item_data = {
+        "order_id": new_order.id,
+        "product_id": reservation.product_id,
+        "quantity": reservation.quantity,
+        "price": product.price
+    }
+    await db.execute(insert(OrderItem).values(**item_data))
+    enqueue_order_created(db, new_order.id, {product.seller_id: amount}, [item_data])
+    return new_order.id
+
+
+@router.post("", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+async def create_reservation(
+    reservation_data: ReservationCreate,
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """Зарезервировать горячий товар (ответ сразу, без записи в базу)"""
+    if not inventory.is_hot(reservation_data.product_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product is not on hot sale, order it directly"
+        )
+
+    reservation = inventory.reserve(current_user.id, reservation_data.product_id, reservation_data.quantity)
+    if reservation is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Not enough quantity"
+        )
+    return reservation
+
+
+@router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_reservation(
+    reservation_id: str,
+    current_user: Principal = Depends(get_current_active_principal)
+):
+    """Отменить свой резерв"""
+    inventory.cancel(_get_own_reservation(reservation_id, current_user))
+    return None
+
+
+@router.post("/{reservation_id}/checkout", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def checkout_reservation(
+    reservation_id: str,
+    current_user: Principal = Depends(get_current_active_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Оформить заказ по резерву (остаток уже списан резервом)"""
+    reservation = _get_own_reservation(reservation_id, current_user)
+    if reservation.expires_at <= datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reservation expired"
+        )
+
+    # Заказ ссылается на запись журнала, поэтому резерв должен быть уже записан
+    if not reservation.journaled:
+        await inventory.flush()
+        if not reservation.journaled or reservation_id not in inventory.reservations:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Reservation is no longer available"
+            )
+
+    inventory.claim(reservation)
+    try:
+        order_id = await run_write(db, lambda session: _place_reserved_order(session, reservation, current_user.id))
+    except BaseException as exc:
+        # Журнал откатился - резерв снова держится; 409 - в журнале он уже не held
+        if not (isinstance(exc, HTTPException) and exc.status_code == status.HTTP_409_CONFLICT):
+            inventory.unclaim(reservation)
+        raise
+
+    outbox_worker.notify()
+    new_order = await db.get(Order, order_id, populate_existing=True)
+    responses = await build_order_responses(db, [new_order])
+    return json_response(order_adapter, responses[0], status_code=status.HTTP_201_CREATED)
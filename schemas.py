@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Any, Dict, Literal, Optional, List
+from datetime import date, datetime
 
 
 class UserBase(BaseModel):
@@ -37,6 +37,7 @@ class ProductBase(BaseModel):
     description: Optional[str] = None
     price: float = Field(..., gt=0)
     quantity: int = Field(..., ge=0)
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
 
 
 class ProductCreate(ProductBase):
@@ -48,11 +49,22 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = Field(None, gt=0)
     quantity: Optional[int] = Field(None, ge=0)
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
+    is_hot: Optional[bool] = None
+
+    @field_validator("name", "price", "quantity", "is_hot")
+    @classmethod
+    def not_null(cls, value):
+        # Пропущенное поле не меняется, а явный null записать нельзя: колонки NOT NULL
+        if value is None:
+            raise ValueError("must not be null")
+        return value
 
 
 class ProductResponse(ProductBase):
     id: int
     seller_id: int
+    is_hot: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -60,6 +72,57 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class ProductPage(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = []
+    errors_truncated: bool = False
+
+
+class ProductBulkUpdateItem(BaseModel):
+    id: int
+    price: Optional[float] = Field(None, gt=0)
+    quantity: Optional[int] = Field(None, ge=0)
+    quantity_delta: Optional[int] = None
+
+
+class ProductBulkUpdateItemResult(BaseModel):
+    id: int
+    status: str  # updated | not_found | forbidden | invalid | insufficient_stock | skipped
+    error: Optional[str] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+
+
+class ProductBulkUpdateResult(BaseModel):
+    applied: bool
+    updated: int = 0
+    failed: int = 0
+    results: List[ProductBulkUpdateItemResult]
+
+
+class ProductSearchResult(ProductResponse):
+    name_highlight: str
+    snippet: Optional[str] = None
+    rank: float
+
+
+class TopProduct(ProductResponse):
+    units_sold: int
+    revenue: float
+    score: float
+
+
 class OrderItemCreate(BaseModel):
     product_id: int
     quantity: int = Field(..., gt=0)
@@ -69,6 +132,21 @@ class OrderCreate(BaseModel):
     items: List[OrderItemCreate] = Field(..., min_items=1)
 
 
+class ReservationCreate(BaseModel):
+    product_id: int
+    quantity: int = Field(..., gt=0)
+
+
+class ReservationResponse(BaseModel):
+    id: str
+    product_id: int
+    quantity: int
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class OrderItemResponse(BaseModel):
     id: int
     product_id: int
@@ -105,3 +183,39 @@ class CommissionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class EarningsBucket(BaseModel):
+    period: str
+    gross: float
+    commission: float
+    net: float
+    order_count: int
+
+
+class CommissionSummary(BaseModel):
+    granularity: str
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    buckets: List[EarningsBucket]
+    total: EarningsBucket
+
+
+class BatchSubRequest(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., pattern=r"^/api/", max_length=2000)  # вместе со строкой запроса
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=20)
+
+
+class BatchSubResponse(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
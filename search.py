@@ -0,0 +1,111 @@
+import html
+import re
+from typing import Optional
+
+from sqlalchemy import DDL, column, delete, event, func, insert, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Product
+
+# Полнотекстовый индекс FTS5 по названию и описанию товаров.
+# rowid виртуальной таблицы совпадает с products.id.
+CREATE_SEARCH_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+    "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+)
+
+products_fts = table("products_fts", column("rowid"), column("name"), column("description"))
+_fts = literal_column("products_fts")
+
+# Вес совпадения в названии относительно описания при ранжировании BM25
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Границы совпадений в highlight() и snippet(): управляющие символы, которые
+# заменяются тегами <mark> только после HTML-экранирования текста товара
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# Новые базы получают индекс вместе с таблицей products (create_all)
+event.listen(Product.__table__, "after_create", DDL(CREATE_SEARCH_INDEX))
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Преобразовать пользовательский запрос в безопасное выражение MATCH (префиксный поиск по словам)"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+async def index_product(db: AsyncSession, product: Product):
+    """Добавить или обновить товар в поисковом индексе (в текущей транзакции)"""
+    await db.execute(delete(products_fts).where(products_fts.c.rowid == product.id))
+    await db.execute(
+        insert(products_fts).values(
+            rowid=product.id,
+            name=product.name,
+            description=product.description or ""
+        )
+    )
+
+
+async def index_products(db: AsyncSession, rows):
+    """Пакетно проиндексировать товары по строкам (id, name, description)"""
+    if not rows:
+        return
+    await db.execute(delete(products_fts).where(products_fts.c.rowid.in_([row.id for row in rows])))
+    await db.execute(
+        insert(products_fts),
+        [{"rowid": row.id, "name": row.name, "description": row.description or ""} for row in rows]
+    )
+
+
+async def unindex_product(db: AsyncSession, product_id: int):
+    """Удалить товар из поискового индекса (в текущей транзакции)"""
+    await db.execute(delete(products_fts).where(products_fts.c.rowid == product_id))
+
+
+def search_query(match: str):
+    """SELECT товаров по FTS-выражению с подсветкой и рангом BM25 (меньше - релевантнее)"""
+    rank = func.bm25(_fts, NAME_WEIGHT, DESCRIPTION_WEIGHT).label("rank")
+    return (
+        select(
+            Product,
+            func.highlight(_fts, 0, MATCH_START, MATCH_END).label("name_highlight"),
+            func.snippet(_fts, 1, MATCH_START, MATCH_END, "…", 12).label("snippet"),
+            rank
+        )
+        .select_from(products_fts)
+        .join(Product, Product.id == products_fts.c.rowid)
+        .where(_fts.match(match))
+        .order_by(rank)
+    )
+
+
+def mark_matches(fragment: str) -> str:
+    """Фрагмент из search_query как HTML: текст продавца экранирован, совпадения в <mark>"""
+    return html.escape(fragment).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+async def rebuild_search_index(conn):
+    """Пересоздать поисковый индекс по текущему содержимому таблицы products"""
+    await conn.execute(text(CREATE_SEARCH_INDEX))
+    await conn.execute(text("DELETE FROM products_fts"))
+    await conn.execute(text(
+        "INSERT INTO products_fts (rowid, name, description) "
+        "SELECT id, name, coalesce(description, '') FROM products"
+    ))
+
+
+if __name__ == "__main__":
+    # Разовая перестройка индекса для существующей базы: python search.py
+    import asyncio
+    from database import engine
+
+    async def main():
+        async with engine.begin() as conn:
+            await rebuild_search_index(conn)
+        await engine.dispose()
+
+    asyncio.run(main())
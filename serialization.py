@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from models import Commission, Order, Product
+
+# Быстрый путь ответов: строки выборки превращаются в словари и сериализуются
+# заранее собранным TypeAdapter сразу в байты. Модели из schemas.py остаются
+# в response_model для документации, но ответ не проходит их проверку повторно:
+# маршрут возвращает готовый Response, и FastAPI его не перепроверяет.
+# Поля и их порядок совпадают с ProductResponse, TopProduct, OrderResponse и CommissionResponse.
+
+
+class ProductRow(TypedDict):
+    name: str
+    description: Optional[str]
+    price: float
+    quantity: int
+    sku: Optional[str]
+    id: int
+    seller_id: int
+    is_hot: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+class ProductPageRow(TypedDict):
+    items: List[ProductRow]
+    next_cursor: Optional[str]
+
+
+class TopProductRow(ProductRow):
+    units_sold: int
+    revenue: float
+    score: float
+
+
+class OrderItemRow(TypedDict):
+    id: int
+    product_id: int
+    product_name: str
+    quantity: int
+    price: float
+
+
+class OrderRow(TypedDict):
+    id: int
+    buyer_id: int
+    total_amount: float
+    status: str
+    created_at: datetime
+    items: List[OrderItemRow]
+
+
+class CommissionRow(TypedDict):
+    id: int
+    order_id: int
+    seller_id: int
+    amount: float
+    commission_rate: float
+    commission_amount: float
+    seller_amount: float
+    created_at: datetime
+
+
+# Колонки для select(*...): строка результата сразу отдается в row._asdict()
+PRODUCT_COLUMNS = tuple(getattr(Product, field) for field in ProductRow.__annotations__)
+ORDER_COLUMNS = tuple(getattr(Order, field) for field in OrderRow.__annotations__ if field != "items")
+COMMISSION_COLUMNS = tuple(getattr(Commission, field) for field in CommissionRow.__annotations__)
+
+product_adapter = TypeAdapter(ProductRow)
+product_page_adapter = TypeAdapter(ProductPageRow)
+top_product_list_adapter = TypeAdapter(List[TopProductRow])
+order_adapter = TypeAdapter(OrderRow)
+order_list_adapter = TypeAdapter(List[OrderRow])
+commission_adapter = TypeAdapter(CommissionRow)
+commission_list_adapter = TypeAdapter(List[CommissionRow])
+
+
+def json_response(adapter: TypeAdapter, data: Any, status_code: int = 200) -> Response:
+    """Ответ с телом из adapter.dump_json: данные пришли из базы и не проверяются повторно"""
+    return Response(content=adapter.dump_json(data), status_code=status_code, media_type="application/json")
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Настройки приложения: читаются из переменных окружения и файла .env"""
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # База данных
+    database_url: str = "sqlite+aiosqlite:///./marketplace.db"
+    # Отдельный URL для чтения (реплика); по умолчанию совпадает с database_url
+    read_database_url: Optional[str] = None
+    database_echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    read_pool_size: int = 10
+    read_max_overflow: int = 20
+    pool_timeout: float = 30.0
+
+    # PRAGMA SQLite, применяются к каждому новому соединению
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456
+
+    # Групповой коммит записей (group_commit.py): один писатель, одна транзакция на такт
+    group_commit: bool = False
+    group_commit_max_batch: int = 64
+    # Сколько такт ждет дополнительные записи после первой (0 - берет только уже ожидающие)
+    group_commit_max_delay_ms: float = 0.0
+
+    # JSON-ответы API от этого размера сжимаются gzip, если клиент его принимает
+    gzip_min_size: int = 1024
+
+    # Аутентификация
+    secret_key: str = "your-secret-key-change-in-production"
+    access_token_expire_minutes: int = 30
+    pbkdf2_rounds: int = 29000
+    hash_workers: int = 4
+    hash_queue_limit: int = 64
+
+
+settings = Settings()
@@ -0,0 +1,90 @@
+const token = localStorage.getItem('token');
+const PAGE_SIZE = 50;
+let lastCommissionId = null;
+
+if (!token) {
+    document.getElementById('auth-message').style.display = 'block';
+} else {
+    loadCommissions();
+}
+
+async function loadSummary() {
+    const response = await fetch('/api/commissions/summary?granularity=month', {
+        headers: {
+            'Authorization': `Bearer ${token}`
+        }
+    });
+    if (!response.ok) return;
+    const summary = await response.json();
+
+    const summaryDiv = document.getElementById('summary');
+    summaryDiv.style.marginTop = '20px';
+    summaryDiv.style.padding = '10px';
+    summaryDiv.style.border = '1px solid black';
+
+    let monthsHtml = '<table border="1"><tr><th>Месяц</th><th>Заказов</th><th>Сумма продаж</th><th>Комиссия</th><th>К выплате</th></tr>';
+    summary.buckets.forEach(bucket => {
+        monthsHtml += `<tr><td>${bucket.period}</td><td>${bucket.order_count}</td><td>${bucket.gross.toFixed(2)}</td><td>${bucket.commission.toFixed(2)}</td><td>${bucket.net.toFixed(2)}</td></tr>`;
+    });
+    monthsHtml += '</table>';
+
+    summaryDiv.innerHTML = `
+        <h3>Итого:</h3>
+        <p><strong>Общая сумма комиссий:</strong> ${summary.total.commission.toFixed(2)}</p>
+        <p><strong>Общая сумма к выплате:</strong> ${summary.total.net.toFixed(2)}</p>
+        ${monthsHtml}
+    `;
+}
+
+async function loadCommissions(beforeId = null) {
+    try {
+        let url = `/api/commissions?limit=${PAGE_SIZE}`;
+        if (beforeId !== null) {
+            url += `&before_id=${beforeId}`;
+        }
+        const response = await fetch(url, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (response.status === 403) {
+            document.getElementById('auth-message').innerHTML = '<p>Доступ только для продавцов</p>';
+            document.getElementById('auth-message').style.display = 'block';
+            return;
+        }
+
+        const commissions = await response.json();
+
+        const commissionsList = document.getElementById('commissions-list');
+        if (beforeId === null) {
+            if (commissions.length === 0) {
+                commissionsList.innerHTML = '<p>У вас пока нет комиссий</p>';
+                return;
+            }
+            commissionsList.innerHTML = '<h2>Список комиссий</h2><table border="1"><tr><th>ID</th><th>Заказ ID</th><th>Сумма заказа</th><th>Ставка комиссии</th><th>Сумма комиссии</th><th>К выплате</th><th>Дата</th></tr></table>';
+            loadSummary();
+        }
+
+        if (commissions.length > 0) {
+            lastCommissionId = commissions[commissions.length - 1].id;
+        }
+        document.getElementById('load-more').style.display = commissions.length === PAGE_SIZE ? 'inline' : 'none';
+
+        commissions.forEach(commission => {
+            const row = document.createElement('tr');
+            row.innerHTML = `
+                <td>${commission.id}</td>
+                <td>${commission.order_id}</td>
+                <td>${commission.amount}</td>
+                <td>${(commission.commission_rate * 100).toFixed(1)}%</td>
+                <td>${commission.commission_amount.toFixed(2)}</td>
+                <td>${commission.seller_amount.toFixed(2)}</td>
+                <td>${new Date(commission.created_at).toLocaleString()}</td>
+            `;
+            commissionsList.querySelector('table').appendChild(row);
+        });
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка загрузки комиссий: ${error.message}</p>`;
+    }
+}
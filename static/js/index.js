@@ -0,0 +1,27 @@
+const token = localStorage.getItem('token');
+if (token) {
+    fetch('/api/auth/me', {
+        headers: {
+            'Authorization': `Bearer ${token}`
+        }
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        throw new Error('Not authorized');
+    })
+    .then(data => {
+        document.getElementById('auth-links').style.display = 'none';
+        document.getElementById('user-info').style.display = 'inline';
+        document.getElementById('username').textContent = data.username;
+    })
+    .catch(() => {
+        localStorage.removeItem('token');
+    });
+}
+
+function logout() {
+    localStorage.removeItem('token');
+    location.reload();
+}
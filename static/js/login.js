@@ -0,0 +1,28 @@
+document.getElementById('loginForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const formData = new FormData();
+    formData.append('username', document.getElementById('username').value);
+    formData.append('password', document.getElementById('password').value);
+
+    try {
+        const response = await fetch('/api/auth/login', {
+            method: 'POST',
+            body: formData
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            localStorage.setItem('token', data.access_token);
+            document.getElementById('message').innerHTML = '<p style="color:green">Успешный вход! Перенаправление...</p>';
+            setTimeout(() => {
+                window.location.href = '/';
+            }, 1000);
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${data.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+});
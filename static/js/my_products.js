@@ -0,0 +1,266 @@
+const token = localStorage.getItem('token');
+let nextCursor = null;
+
+// Первая загрузка: профиль и товары продавца одним пакетным запросом
+async function loadSellerPage() {
+    if (!token) {
+        document.getElementById('auth-message').style.display = 'block';
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+                requests: [
+                    { path: '/api/auth/me' },
+                    { path: '/api/products/mine' }
+                ]
+            })
+        });
+        if (!response.ok) return;
+
+        const [me, mine] = (await response.json()).responses;
+        if (me.status !== 200) return;
+        if (me.body.is_seller) {
+            document.getElementById('productForm').style.display = 'block';
+            document.getElementById('importForm').style.display = 'block';
+            renderMyProducts(mine.body, null);
+        } else {
+            document.getElementById('auth-message').innerHTML = '<p>Вы не являетесь продавцом. <button onclick="becomeSeller()">Стать продавцом</button></p>';
+            document.getElementById('auth-message').style.display = 'block';
+        }
+    } catch (error) {
+        console.error(error);
+    }
+}
+
+async function becomeSeller() {
+    try {
+        const response = await fetch('/api/auth/become-seller', {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (response.ok) {
+            location.reload();
+        }
+    } catch (error) {
+        alert('Ошибка: ' + error.message);
+    }
+}
+
+async function loadMyProducts(cursor = null) {
+    if (!token) return;
+
+    try {
+        const params = new URLSearchParams();
+        const lowStock = document.getElementById('low-stock').value;
+        if (lowStock !== '') params.set('low_stock', lowStock);
+        if (cursor) params.set('cursor', cursor);
+
+        const response = await fetch(`/api/products/mine?${params}`, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+        renderMyProducts(await response.json(), cursor);
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка загрузки товаров: ${error.message}</p>`;
+    }
+}
+
+function renderMyProducts(page, cursor) {
+    const myProducts = page.items;
+
+    nextCursor = page.next_cursor;
+    document.getElementById('load-more').style.display = nextCursor ? 'inline' : 'none';
+
+    const productsList = document.getElementById('products-list');
+    if (!cursor) {
+        if (myProducts.length === 0) {
+            productsList.innerHTML = '<p>У вас пока нет товаров</p>';
+            return;
+        }
+        productsList.innerHTML = '<table border="1"><tr><th>ID</th><th>Название</th><th>Описание</th><th>Цена</th><th>Количество</th><th>Действия</th></tr>';
+    }
+
+    myProducts.forEach(product => {
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td>${product.id}</td>
+            <td>${product.name}</td>
+            <td>${product.description || '-'}</td>
+            <td>${product.price}</td>
+            <td>${product.quantity}</td>
+            <td>
+                <button onclick="editProduct(${product.id})">Редактировать</button>
+                <button onclick="toggleHot(${product.id}, ${!product.is_hot})">${product.is_hot ? 'Снять горячую продажу' : 'Горячая продажа'}</button>
+                <button onclick="deleteProduct(${product.id})">Удалить</button>
+            </td>
+        `;
+        productsList.querySelector('table').appendChild(row);
+    });
+}
+
+document.getElementById('productForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const data = {
+        name: document.getElementById('name').value,
+        description: document.getElementById('description').value,
+        price: parseFloat(document.getElementById('price').value),
+        quantity: parseInt(document.getElementById('quantity').value)
+    };
+
+    try {
+        const response = await fetch('/api/products', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Товар добавлен!</p>';
+            document.getElementById('productForm').reset();
+            loadMyProducts();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+});
+
+document.getElementById('importForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const file = document.getElementById('importFile').files[0];
+    const format = file.name.toLowerCase().endsWith('.csv') ? 'csv' : 'ndjson';
+    const upsert = document.getElementById('importUpsert').checked;
+
+    try {
+        const response = await fetch(`/api/products/bulk?format=${format}&upsert=${upsert}`, {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            },
+            body: file
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            let html = `<p style="color:green">Загружено: ${result.imported}, с ошибками: ${result.failed}</p>`;
+            if (result.errors.length > 0) {
+                html += '<ul>' + result.errors.map(error => `<li>Строка ${error.row}: ${error.error}</li>`).join('') + '</ul>';
+            }
+            document.getElementById('message').innerHTML = html;
+            loadMyProducts();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+});
+
+function editProduct(productId) {
+    const name = prompt('Новое название:');
+    if (!name) return;
+
+    const description = prompt('Новое описание:');
+    const price = prompt('Новая цена:');
+    const quantity = prompt('Новое количество:');
+
+    const updateData = {};
+    if (name) updateData.name = name;
+    if (description !== null) updateData.description = description;
+    if (price) updateData.price = parseFloat(price);
+    if (quantity !== null) updateData.quantity = parseInt(quantity);
+
+    fetch(`/api/products/${productId}`, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/json',
+            'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify(updateData)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.id) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Товар обновлен!</p>';
+            loadMyProducts();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    })
+    .catch(error => {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    });
+}
+
+async function toggleHot(productId, isHot) {
+    try {
+        const response = await fetch(`/api/products/${productId}`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({is_hot: isHot})
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Товар обновлен!</p>';
+            loadMyProducts();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+}
+
+function deleteProduct(productId) {
+    if (!confirm('Удалить товар?')) return;
+
+    fetch(`/api/products/${productId}`, {
+        method: 'DELETE',
+        headers: {
+            'Authorization': `Bearer ${token}`
+        }
+    })
+    .then(response => {
+        if (response.status === 204) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Товар удален!</p>';
+            loadMyProducts();
+        } else {
+            return response.json();
+        }
+    })
+    .then(result => {
+        if (result && result.detail) {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    })
+    .catch(error => {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    });
+}
+
+loadSellerPage();
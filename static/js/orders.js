@@ -0,0 +1,88 @@
+const token = localStorage.getItem('token');
+const PAGE_SIZE = 50;
+let lastOrderId = null;
+
+if (!token) {
+    document.getElementById('auth-message').style.display = 'block';
+} else {
+    loadOrders();
+}
+
+async function loadOrders(beforeId = null) {
+    try {
+        let url = `/api/orders?limit=${PAGE_SIZE}`;
+        if (beforeId !== null) {
+            url += `&before_id=${beforeId}`;
+        }
+        const response = await fetch(url, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const orders = await response.json();
+
+        const ordersList = document.getElementById('orders-list');
+        if (beforeId === null) {
+            if (orders.length === 0) {
+                ordersList.innerHTML = '<p>У вас пока нет заказов</p>';
+                document.getElementById('load-more').style.display = 'none';
+                return;
+            }
+            ordersList.innerHTML = '<h2>Список заказов</h2>';
+        }
+
+        if (orders.length > 0) {
+            lastOrderId = orders[orders.length - 1].id;
+        }
+        document.getElementById('load-more').style.display = orders.length === PAGE_SIZE ? 'inline' : 'none';
+
+        orders.forEach(order => {
+            const orderDiv = document.createElement('div');
+            orderDiv.style.border = '1px solid black';
+            orderDiv.style.padding = '10px';
+            orderDiv.style.margin = '10px 0';
+
+            let itemsHtml = '<ul>';
+            order.items.forEach(item => {
+                itemsHtml += `<li>${item.product_name} - ${item.quantity} шт. x ${item.price} = ${item.quantity * item.price}</li>`;
+            });
+            itemsHtml += '</ul>';
+
+            orderDiv.innerHTML = `
+                <h3>Заказ #${order.id}</h3>
+                <p><strong>Статус:</strong> ${order.status}</p>
+                <p><strong>Общая сумма:</strong> ${order.total_amount}</p>
+                <p><strong>Дата создания:</strong> ${new Date(order.created_at).toLocaleString()}</p>
+                <p><strong>Товары:</strong></p>
+                ${itemsHtml}
+                ${order.status === 'pending' ? `<button onclick="completeOrder(${order.id})">Завершить заказ</button>` : ''}
+            `;
+
+            ordersList.appendChild(orderDiv);
+        });
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка загрузки заказов: ${error.message}</p>`;
+    }
+}
+
+function completeOrder(orderId) {
+    fetch(`/api/orders/${orderId}/complete`, {
+        method: 'PUT',
+        headers: {
+            'Authorization': `Bearer ${token}`
+        }
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.id) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Заказ завершен!</p>';
+            loadOrders();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    })
+    .catch(error => {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    });
+}
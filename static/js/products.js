@@ -0,0 +1,177 @@
+const token = localStorage.getItem('token');
+let nextCursor = null;
+// Показанные товары по id: строки таблицы обновляются по событиям /api/products/events
+const shownProducts = {};
+
+if (!token) {
+    document.getElementById('auth-message').style.display = 'block';
+} else {
+    document.getElementById('orderForm').style.display = 'block';
+}
+
+async function loadProducts(cursor = null) {
+    try {
+        const params = new URLSearchParams();
+        const minPrice = document.getElementById('min-price').value;
+        const maxPrice = document.getElementById('max-price').value;
+        if (minPrice !== '') params.set('min_price', minPrice);
+        if (maxPrice !== '') params.set('max_price', maxPrice);
+        if (document.getElementById('in-stock').checked) params.set('in_stock', 'true');
+        params.set('sort', document.getElementById('sort').value);
+        if (cursor) params.set('cursor', cursor);
+
+        const response = await fetch(`/api/products?${params}`);
+        const page = await response.json();
+        const products = page.items;
+
+        const productsList = document.getElementById('products-list');
+        if (!cursor) {
+            Object.keys(shownProducts).forEach(key => delete shownProducts[key]);
+            productsList.innerHTML = '<table border="1"><tr><th>ID</th><th>Название</th><th>Описание</th><th>Цена</th><th>Количество</th><th>Продавец ID</th><th>Действие</th></tr>';
+        }
+        nextCursor = page.next_cursor;
+        document.getElementById('load-more').style.display = nextCursor ? 'inline' : 'none';
+
+        products.forEach(product => {
+            const row = document.createElement('tr');
+            row.id = `product-${product.id}`;
+            row.innerHTML = `
+                <td>${product.id}</td>
+                <td>${product.name}</td>
+                <td>${product.description || '-'}</td>
+                <td class="price">${product.price}</td>
+                <td class="quantity">${product.quantity}</td>
+                <td>${product.seller_id}</td>
+                <td>
+                    ${token ? `<button onclick="addToOrder(${product.id})">Добавить в заказ</button>` : '-'}
+                </td>
+            `;
+            shownProducts[product.id] = product;
+            productsList.querySelector('table').appendChild(row);
+        });
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка загрузки товаров: ${error.message}</p>`;
+    }
+}
+
+const orderItems = {};
+
+function addToOrder(productId) {
+    const product = shownProducts[productId];
+    const productName = product.name;
+    const availableQuantity = product.quantity;
+    if (!orderItems[productId]) {
+        orderItems[productId] = {
+            name: productName,
+            price: product.price,
+            quantity: 0,
+            available: availableQuantity
+        };
+    }
+
+    const quantity = prompt(`Введите количество для "${productName}" (доступно: ${availableQuantity}):`);
+    if (quantity && parseInt(quantity) > 0 && parseInt(quantity) <= availableQuantity) {
+        orderItems[productId].quantity = parseInt(quantity);
+        updateOrderForm();
+    }
+}
+
+function updateOrderForm() {
+    const orderItemsDiv = document.getElementById('order-items');
+    orderItemsDiv.innerHTML = '';
+
+    Object.keys(orderItems).forEach(productId => {
+        const item = orderItems[productId];
+        if (item.quantity > 0) {
+            const div = document.createElement('div');
+            div.innerHTML = `
+                <p>${item.name} - ${item.quantity} шт. x ${item.price} = ${item.quantity * item.price}
+                <button onclick="removeFromOrder(${productId})">Удалить</button></p>
+            `;
+            orderItemsDiv.appendChild(div);
+        }
+    });
+}
+
+function removeFromOrder(productId) {
+    delete orderItems[productId];
+    updateOrderForm();
+}
+
+document.getElementById('orderForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    if (!token) {
+        alert('Необходимо войти в систему');
+        return;
+    }
+
+    const items = Object.keys(orderItems)
+        .filter(id => orderItems[id].quantity > 0)
+        .map(id => ({
+            product_id: parseInt(id),
+            quantity: orderItems[id].quantity
+        }));
+
+    if (items.length === 0) {
+        alert('Добавьте товары в заказ');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/orders', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({ items: items })
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            document.getElementById('message').innerHTML = `<p style="color:green">Заказ создан! ID: ${result.id}, Сумма: ${result.total_amount}</p>`;
+            Object.keys(orderItems).forEach(key => delete orderItems[key]);
+            updateOrderForm();
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+});
+
+function applyProductChange(change) {
+    const row = document.getElementById(`product-${change.id}`);
+    const product = shownProducts[change.id];
+    if (change.deleted) {
+        if (row) row.remove();
+        delete shownProducts[change.id];
+        if (orderItems[change.id]) removeFromOrder(change.id);
+        return;
+    }
+    if (!row || !product) return;
+    if (change.price !== undefined) {
+        product.price = change.price;
+        row.querySelector('.price').textContent = change.price;
+    }
+    if (change.quantity !== undefined) {
+        product.quantity = change.quantity;
+        row.querySelector('.quantity').textContent = change.quantity;
+    }
+    const item = orderItems[change.id];
+    if (item) {
+        item.price = product.price;
+        item.available = product.quantity;
+        if (item.quantity > item.available) item.quantity = item.available;
+        updateOrderForm();
+    }
+}
+
+// Остатки и цены обновляются на месте; resync - изменения потеряны, перечитываем каталог
+const productEvents = new EventSource('/api/products/events');
+productEvents.onmessage = (event) => JSON.parse(event.data).forEach(applyProductChange);
+productEvents.addEventListener('resync', () => loadProducts());
+
+loadProducts();
@@ -0,0 +1,32 @@
+document.getElementById('registerForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const data = {
+        email: document.getElementById('email').value,
+        username: document.getElementById('username').value,
+        password: document.getElementById('password').value
+    };
+
+    try {
+        const response = await fetch('/api/auth/register', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+
+        if (response.ok) {
+            document.getElementById('message').innerHTML = '<p style="color:green">Регистрация успешна! Перенаправление на страницу входа...</p>';
+            setTimeout(() => {
+                window.location.href = '/login';
+            }, 2000);
+        } else {
+            document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${result.detail}</p>`;
+        }
+    } catch (error) {
+        document.getElementById('message').innerHTML = `<p style="color:red">Ошибка: ${error.message}</p>`;
+    }
+});
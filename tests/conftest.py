@@ -0,0 +1,84 @@
+"""Общие фикстуры: приложение на временной базе из миграций.
+
+Движки database.py создаются при импорте по settings, поэтому адрес временной
+базы задается переменной окружения до импорта приложения. Жизненный цикл
+приложения (фоновые задачи, пул потоков хеширования) запускается один раз на
+сессию тестов в собственном цикле событий; тесты выполняют в нем свои сценарии.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+_DB_DIR = tempfile.mkdtemp(prefix="marketplace-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_DIR}/marketplace.db"
+# Исчерпанный пул должен проявляться в тестах ошибкой за секунды, а не за 30 с
+os.environ["POOL_TIMEOUT"] = "5"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+@pytest.fixture(scope="session")
+def app_loop():
+    """Цикл событий с запущенным приложением на мигрированной временной базе"""
+    from alembic import command
+
+    from main import app
+
+    command.upgrade(alembic_config(), "head")
+    loop = asyncio.new_event_loop()
+    lifespan = app.router.lifespan_context(app)
+    loop.run_until_complete(lifespan.__aenter__())
+    yield loop
+    loop.run_until_complete(lifespan.__aexit__(None, None, None))
+    loop.close()
+
+
+@pytest.fixture
+def run(app_loop):
+    """run(scenario): выполнить async-сценарий scenario(client) в цикле приложения"""
+    from main import app
+
+    def run_scenario(scenario):
+        async def with_client():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+
+        return app_loop.run_until_complete(with_client())
+
+    return run_scenario
+
+
+async def register(client: httpx.AsyncClient, seller: bool = False) -> dict:
+    """Зарегистрировать нового пользователя и вернуть заголовки с его токеном"""
+    username = f"user{uuid.uuid4().hex[:12]}"
+    password = "secret1"
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": f"{username}@example.com", "username": username, "password": password}
+    )
+    assert response.status_code == 201, response.text
+    response = await client.post("/api/auth/login", data={"username": username, "password": password})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    if seller:
+        response = await client.post("/api/auth/become-seller", headers=headers)
+        assert response.status_code == 200, response.text
+    return headers
@@ -0,0 +1,53 @@
+"""Пакетные запросы POST /api/batch"""
+from conftest import register
+
+
+def _statuses(response):
+    assert response.status_code == 200, response.text
+    return [sub["status"] for sub in response.json()["responses"]]
+
+
+def test_batch_rechecks_token_after_write(run):
+    async def scenario(client):
+        headers = await register(client)
+        return await client.post("/api/batch", headers=headers, json={"requests": [
+            {"path": "/api/products/mine"},
+            {"method": "POST", "path": "/api/auth/become-seller"},
+            {"method": "POST", "path": "/api/products", "body": {"name": "Lamp", "price": 5, "quantity": 1}},
+            {"path": "/api/products/mine"},
+        ]})
+
+    response = run(scenario)
+    assert _statuses(response) == [403, 200, 201, 200]
+    assert [item["name"] for item in response.json()["responses"][3]["body"]["items"]] == ["Lamp"]
+
+
+def test_batch_keeps_request_order(run):
+    async def scenario(client):
+        seller = await register(client, seller=True)
+        product_id = (await client.post(
+            "/api/products", headers=seller, json={"name": "Mug", "price": 3, "quantity": 1}
+        )).json()["id"]
+        path = f"/api/products/{product_id}"
+        return await client.post("/api/batch", headers=seller, json={"requests": [
+            {"path": path},
+            {"path": "/api/products/mine"},
+            {"method": "DELETE", "path": path},
+            {"path": path},
+        ]})
+
+    response = run(scenario)
+    assert _statuses(response) == [200, 200, 204, 404]
+    assert response.json()["responses"][0]["body"]["name"] == "Mug"
+
+
+def test_batch_rejects_excluded_paths_after_normalization(run):
+    async def scenario(client):
+        headers = await register(client)
+        return await client.post("/api/batch", headers=headers, json={"requests": [
+            {"path": "/api/products%2Fevents"},
+            {"path": "/api/products/../batch"},
+            {"path": "/api/../docs"},
+        ]})
+
+    assert _statuses(run(scenario)) == [400, 400, 400]
@@ -0,0 +1,108 @@
+"""Планы запросов каталога (GET /api/products) на схеме из миграций.
+
+Ни одно сочетание фильтров и сортировки, с курсором и без, не сортирует выборку
+во временном B-дереве: страница читается индексом сортировки. Полный обход
+("SCAN") допускается только в порядке сортировки по ее собственному индексу
+(IN_ORDER_WALKS) и только на первой странице без продавца и без границы на
+колонке сортировки: обход останавливается на LIMIT, остальные фильтры
+проверяются на ходу. Курсор, seller_id или граница превращают его в SEARCH.
+"""
+import itertools
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+
+from pagination import encode_cursor
+from routers.products import PRODUCT_SORTS, products_page_query
+from settings import settings
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FILTERS = {
+    "min_price": 5.0,
+    "max_price": 50.0,
+    "in_stock": True,
+    "seller_id": 3,
+    "created_after": datetime(2026, 1, 1),
+}
+# Ключ сортировки в курсоре, как его кладет make_page
+CURSOR_SORT_KEYS = {
+    "id": 5,
+    "newest": "2026-01-01 00:00:00",
+    "price_asc": 10.0,
+    "price_desc": 10.0,
+    "name": "a",
+    "popular": 1.0,
+}
+# Допустимый обход первой страницы: сортировка -> шаг плана
+IN_ORDER_WALKS = {
+    "id": "SCAN products",
+    "newest": "SCAN products USING INDEX ix_products_created_at_id",
+    "price_asc": "SCAN products USING INDEX ix_products_price_id",
+    "price_desc": "SCAN products USING INDEX ix_products_price_id",
+    "name": "SCAN products USING INDEX ix_products_name",
+    "popular": "SCAN product_sales_stats USING COVERING INDEX ix_product_sales_stats_score_7d",
+}
+# Сортировка id с in_stock идет по частичному индексу товаров с остатком
+IN_STOCK_ID_WALK = "SCAN products USING INDEX ix_products_in_stock_id"
+# Фильтры, которые задают границу обхода индекса сортировки
+SORT_BOUNDS = {
+    "newest": {"created_after"},
+    "price_asc": {"min_price", "max_price"},
+    "price_desc": {"min_price", "max_price"},
+}
+
+CASES = [
+    (sort, filters, with_cursor)
+    for sort in PRODUCT_SORTS
+    for size in range(len(FILTERS) + 1)
+    for filters in itertools.combinations(FILTERS, size)
+    for with_cursor in (False, True)
+]
+
+
+@pytest.fixture(scope="module")
+def plan_connection(tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "catalog.db"
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    config.attributes["configure_logger"] = False
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{path}")
+        command.upgrade(config, "head")
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _query_plan(connection, sort, filters, with_cursor):
+    cursor = encode_cursor(CURSOR_SORT_KEYS[sort], 5) if with_cursor else None
+    params = {name: FILTERS.get(name) if name in filters else None for name in FILTERS}
+    params["in_stock"] = "in_stock" in filters
+    query = products_page_query(cursor, sort=sort, **params).limit(101)
+    compiled = query.compile(dialect=connection.dialect)
+    values = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), values)
+    return [row[3] for row in rows]
+
+
+def _allowed_walks(sort, filters, with_cursor):
+    if with_cursor or "seller_id" in filters or SORT_BOUNDS.get(sort, set()) & set(filters):
+        return set()
+    if sort == "id" and "in_stock" in filters:
+        return {IN_STOCK_ID_WALK}
+    return {IN_ORDER_WALKS[sort]}
+
+
+@pytest.mark.parametrize("sort,filters,with_cursor", CASES)
+def test_catalog_page_reads_products_by_index(plan_connection, sort, filters, with_cursor):
+    plan = _query_plan(plan_connection, sort, filters, with_cursor)
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    walks = {step for step in plan if step.startswith("SCAN")}
+    assert walks <= _allowed_walks(sort, filters, with_cursor), plan
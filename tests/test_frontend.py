@@ -0,0 +1,29 @@
+"""Страницы и статические ассеты: ETag и сжатые варианты"""
+import pytest
+
+from main import frontend
+
+
+def _asset_path():
+    return min(url for url in frontend.urls.values() if url.endswith(".js"))
+
+
+@pytest.mark.parametrize("path", ["/", "asset"])
+def test_compressed_variants_get_weak_etag(run, path):
+    path = _asset_path() if path == "asset" else path
+
+    async def scenario(client):
+        identity = await client.get(path, headers={"Accept-Encoding": "identity"})
+        gzipped = await client.get(path, headers={"Accept-Encoding": "gzip"})
+        revalidated = await client.get(
+            path, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]}
+        )
+        return identity, gzipped, revalidated
+
+    identity, gzipped, revalidated = run(scenario)
+    assert identity.status_code == 200 and "content-encoding" not in identity.headers
+    assert gzipped.status_code == 200 and gzipped.headers["content-encoding"] == "gzip"
+    assert not identity.headers["etag"].startswith("W/")
+    assert gzipped.headers["etag"] == "W/" + identity.headers["etag"]
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzipped.headers["etag"]
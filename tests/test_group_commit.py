@@ -0,0 +1,145 @@
+"""Групповой коммит (group_commit.py) на соединении писателя из database.py"""
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from conftest import register
+from database import async_session_maker, writer_session_maker
+from group_commit import GroupCommitWriter
+from models import Product
+from settings import settings
+
+
+async def _seller_id(client) -> int:
+    headers = await register(client, seller=True)
+    return (await client.get("/api/auth/me", headers=headers)).json()["id"]
+
+
+def _insert_product(seller_id: int, sku: str):
+    async def unit(db):
+        result = await db.execute(
+            insert(Product)
+            .values(name=sku, price=1.0, quantity=1, seller_id=seller_id, sku=sku)
+            .returning(Product.id)
+        )
+        return result.scalar_one()
+    return unit
+
+
+async def _skus(seller_id: int) -> list:
+    async with async_session_maker() as db:
+        result = await db.execute(select(Product.sku).where(Product.seller_id == seller_id).order_by(Product.sku))
+        return list(result.scalars())
+
+
+def test_failing_unit_leaves_rest_of_batch_committed(run):
+    async def scenario(client):
+        seller_id = await _seller_id(client)
+        insert_a = _insert_product(seller_id, "a")
+
+        async def insert_then_fail(db):
+            await _insert_product(seller_id, "b")(db)
+            raise ValueError("unit failed after writing")
+
+        writer = GroupCommitWriter(session_maker=writer_session_maker, max_delay=0.05)
+        writer.start()
+        try:
+            results = await asyncio.gather(
+                writer.submit(insert_a),
+                writer.submit(_insert_product(seller_id, "a")),
+                writer.submit(insert_then_fail),
+                writer.submit(_insert_product(seller_id, "c")),
+                return_exceptions=True
+            )
+        finally:
+            await writer.stop()
+        return results, writer.batches_total, await _skus(seller_id)
+
+    results, batches, skus = run(scenario)
+    assert batches == 1
+    assert isinstance(results[0], int) and isinstance(results[3], int)
+    assert isinstance(results[1], IntegrityError)
+    assert isinstance(results[2], ValueError)
+    assert skus == ["a", "c"]
+
+
+def test_failed_commit_reaches_every_caller(run):
+    def failing_session_maker():
+        session = writer_session_maker()
+
+        @event.listens_for(session.sync_session, "before_commit")
+        def fail_commit(sync_session):
+            # before_commit приходит и на RELEASE точки сохранения единицы; ломаем только общий коммит
+            if not sync_session.in_nested_transaction():
+                raise RuntimeError("commit failed")
+
+        return session
+
+    async def scenario(client):
+        seller_id = await _seller_id(client)
+        writer = GroupCommitWriter(session_maker=failing_session_maker, max_delay=0.05)
+        writer.start()
+        try:
+            results = await asyncio.gather(
+                *(writer.submit(_insert_product(seller_id, sku)) for sku in ("a", "b", "c")),
+                return_exceptions=True
+            )
+        finally:
+            await writer.stop()
+        return results, await _skus(seller_id)
+
+    results, skus = run(scenario)
+    assert [str(result) for result in results] == ["commit failed"] * 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert skus == []
+
+
+def test_cancelled_caller_unit_is_skipped(run):
+    async def scenario(client):
+        seller_id = await _seller_id(client)
+        writer = GroupCommitWriter(session_maker=writer_session_maker)
+        # Единицы попадают в очередь до запуска писателя; первого вызывающего отменяют
+        cancelled = asyncio.create_task(writer.submit(_insert_product(seller_id, "a")))
+        kept = asyncio.create_task(writer.submit(_insert_product(seller_id, "b")))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        writer.start()
+        try:
+            await kept
+        finally:
+            await writer.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await _skus(seller_id)
+
+    assert run(scenario) == ["b"]
+
+
+def test_batch_transaction_takes_write_lock_at_begin(run):
+    path = settings.database_url.split("///", 1)[1]
+
+    async def probe_write_lock(db):
+        # Единица пока только читала, но блокировку записи транзакция уже держит:
+        # иначе запись после чтения могла бы получить SQLITE_BUSY
+        await db.execute(select(Product.id).limit(1))
+        connection = sqlite3.connect(path, timeout=0)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as exc:
+            return str(exc)
+        finally:
+            connection.close()
+        return None
+
+    async def scenario(client):
+        writer = GroupCommitWriter(session_maker=writer_session_maker)
+        writer.start()
+        try:
+            return await writer.submit(probe_write_lock)
+        finally:
+            await writer.stop()
+
+    assert run(scenario) == "database is locked"
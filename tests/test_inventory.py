@@ -0,0 +1,48 @@
+"""Счетчики горячих товаров (inventory.py) под наплывом заказов"""
+import asyncio
+
+from sqlalchemy import select
+
+from conftest import register
+from database import async_session_maker
+from inventory import inventory
+from models import Product
+from settings import settings
+
+
+def test_hot_orders_beyond_pool_size_with_pending_reservations(run):
+    orders_count = 2 * (settings.pool_size + settings.max_overflow)
+
+    async def scenario(client):
+        seller = await register(client, seller=True)
+        buyer = await register(client)
+        response = await client.post(
+            "/api/products", headers=seller, json={"name": "Flash", "price": 10, "quantity": 10}
+        )
+        product_id = response.json()["id"]
+        response = await client.put(f"/api/products/{product_id}", headers=seller, json={"is_hot": True})
+        assert response.status_code == 200, response.text
+
+        # Заказы приходят, пока идет сброс, и за ним остаются незаписанные резервы:
+        # следующий сброс должен получить соединение, даже когда заказов больше пула
+        await inventory.flush()
+        async with inventory._lock:
+            orders = [
+                asyncio.create_task(client.post(
+                    "/api/orders", headers=buyer, json={"items": [{"product_id": product_id, "quantity": 1}]}
+                ))
+                for _ in range(orders_count)
+            ]
+            await asyncio.sleep(0.5)
+            for _ in range(2):
+                assert inventory.reserve(0, product_id, 1) is not None
+        responses = await asyncio.gather(*orders)
+        await inventory.flush()
+        async with async_session_maker() as db:
+            quantity = await db.scalar(select(Product.quantity).where(Product.id == product_id))
+        return [response.status_code for response in responses], quantity
+
+    statuses, quantity = run(scenario)
+    assert set(statuses) <= {201, 422}, statuses
+    assert statuses.count(201) == 8
+    assert quantity == 0
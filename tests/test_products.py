@@ -0,0 +1,139 @@
+"""Каталог, изменение и удаление товаров продавцом"""
+import itertools
+
+from sqlalchemy import select
+
+from catalog_cache import bump_catalog_version
+from conftest import register
+from database import async_session_maker
+from inventory import inventory
+from models import InventoryReservation
+from popularity import add_sales, remove_product
+from routers.orders import DELETED_PRODUCT_NAME
+from routers.products import PRODUCT_SORTS
+
+
+def test_delete_ordered_product_keeps_order_history(run):
+    async def scenario(client):
+        seller = await register(client, seller=True)
+        buyer = await register(client)
+        response = await client.post(
+            "/api/products", headers=seller, json={"name": "Kettle", "price": 25, "quantity": 5}
+        )
+        product_id = response.json()["id"]
+        response = await client.post(
+            "/api/orders", headers=buyer, json={"items": [{"product_id": product_id, "quantity": 2}]}
+        )
+        assert response.status_code == 201, response.text
+        order_id = response.json()["id"]
+
+        # Держащийся резерв горячего товара, уже записанный в журнал
+        response = await client.put(f"/api/products/{product_id}", headers=seller, json={"is_hot": True})
+        assert response.status_code == 200, response.text
+        response = await client.post("/api/reservations", headers=buyer, json={"product_id": product_id, "quantity": 1})
+        assert response.status_code == 201, response.text
+        reservation_id = response.json()["id"]
+        await inventory.flush()
+
+        response = await client.delete(f"/api/products/{product_id}", headers=seller)
+        assert response.status_code == 204, response.text
+
+        order = (await client.get(f"/api/orders/{order_id}", headers=buyer)).json()
+        async with async_session_maker() as db:
+            reservation_status = await db.scalar(
+                select(InventoryReservation.status).where(InventoryReservation.id == reservation_id)
+            )
+        return product_id, order, reservation_status, reservation_id
+
+    product_id, order, reservation_status, reservation_id = run(scenario)
+    assert [(item["product_id"], item["product_name"], item["quantity"]) for item in order["items"]] == [
+        (product_id, DELETED_PRODUCT_NAME, 2)
+    ]
+    assert reservation_status == "expired"
+    assert not inventory.is_hot(product_id)
+    assert reservation_id not in inventory.reservations
+
+
+def test_catalog_pages_match_filters_for_every_sort(run):
+    filters = {"min_price": 15, "max_price": 40, "in_stock": True, "created_after": "2000-01-01T00:00:00"}
+
+    async def scenario(client):
+        seller = await register(client, seller=True)
+        products = []
+        for name, price, quantity in [("d", 10, 0), ("b", 20, 3), ("a", 20, 0), ("e", 30, 1), ("c", 50, 2)]:
+            response = await client.post(
+                "/api/products", headers=seller, json={"name": name, "price": price, "quantity": quantity}
+            )
+            products.append(response.json())
+        seller_id = products[0]["seller_id"]
+        # Продажи: у третьего товара строка продаж заводится заново из add_sales
+        async with async_session_maker() as db:
+            await remove_product(db, products[2]["id"])
+            await add_sales(db, [
+                {"product_id": products[2]["id"], "quantity": 2, "price": 20},
+                {"product_id": products[3]["id"], "quantity": 1, "price": 30},
+            ])
+            await bump_catalog_version(db)
+            await db.commit()
+        scores = {products[2]["id"]: 2, products[3]["id"]: 1}
+
+        pages = {}
+        for sort in PRODUCT_SORTS:
+            for size in range(len(filters) + 1):
+                for names in itertools.combinations(filters, size):
+                    params = {"sort": sort, "seller_id": seller_id, "limit": 2}
+                    params.update({name: filters[name] for name in names})
+                    ids, cursor = [], None
+                    while True:
+                        if cursor is not None:
+                            params["cursor"] = cursor
+                        response = await client.get("/api/products", params=params)
+                        assert response.status_code == 200, response.text
+                        page = response.json()
+                        ids += [item["id"] for item in page["items"]]
+                        cursor = page["next_cursor"]
+                        if cursor is None:
+                            break
+                    pages[sort, names] = ids
+        response = await client.get(
+            "/api/products", params={"seller_id": seller_id, "created_after": "2999-01-01T00:00:00"}
+        )
+        return products, scores, pages, response.json()["items"]
+
+    products, scores, pages, future = run(scenario)
+    assert future == []
+    order = {
+        "id": lambda p: p["id"],
+        "newest": lambda p: -p["id"],
+        "price_asc": lambda p: (p["price"], p["id"]),
+        "price_desc": lambda p: (-p["price"], -p["id"]),
+        "name": lambda p: (p["name"], p["id"]),
+        "popular": lambda p: (-scores.get(p["id"], 0), -p["id"]),
+    }
+    for (sort, names), ids in pages.items():
+        expected = [
+            p for p in products
+            if ("min_price" not in names or p["price"] >= filters["min_price"])
+            and ("max_price" not in names or p["price"] <= filters["max_price"])
+            and ("in_stock" not in names or p["quantity"] > 0)
+        ]
+        assert ids == [p["id"] for p in sorted(expected, key=order[sort])], (sort, names)
+
+
+def test_search_highlight_escapes_product_text(run):
+    async def scenario(client):
+        seller = await register(client, seller=True)
+        await client.post("/api/products", headers=seller, json={
+            "name": "Kettle <b>x</b>",
+            "description": "Steel kettle <script>alert(1)</script> & lid",
+            "price": 12,
+            "quantity": 1
+        })
+        response = await client.get("/api/products/search", params={"q": "kettle"})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    results = [result for result in run(scenario) if result["name"] == "Kettle <b>x</b>"]
+    assert len(results) == 1
+    assert results[0]["name_highlight"] == "<mark>Kettle</mark> &lt;b&gt;x&lt;/b&gt;"
+    assert results[0]["snippet"] == "Steel <mark>kettle</mark> &lt;script&gt;alert(1)&lt;/script&gt; &amp; lid"